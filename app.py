@@ -1,5 +1,9 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, g, Response
+from flask.json.provider import DefaultJSONProvider
+import hmac
+import math
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
@@ -7,16 +11,78 @@ from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
-from core.blockchain import Blockchain
-from core.verifier import GeoSentinel
-from core.marketplace import CarbonMarketplace
+from core.service import GeoVerifyService, DATA_DIR_ENV
+from core import cluster
+from core import metrics
+from core.profiling import ProfileStore
+from core.concurrency import AdmissionController
+from core import serialization
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Routes jsonify() through core.serialization (orjson when installed)"""
+
+    def dumps(self, obj, **kwargs):
+        return serialization.dumps(obj, sort_keys=self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            serialization.dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype
+        )
+
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 
 # Initialize Core Components
-blockchain = Blockchain()
-sentinel = GeoSentinel()
-marketplace = CarbonMarketplace(blockchain)
+# In production (see gunicorn.conf.py) the state lives in a single writer process
+# and this worker only holds a proxy to it; otherwise everything runs in-process.
+STATE_IS_REMOTE = bool(os.environ.get(cluster.ADDRESS_ENV))
+if STATE_IS_REMOTE:
+    service = cluster.connect()
+    # Spans run in the writer; send this worker's request timings there too so
+    # /api/metrics on any worker shows the same, complete histograms
+    metrics.registry.forward_to(service.record_metrics)
+else:
+    service = GeoVerifyService(data_dir=os.environ.get(DATA_DIR_ENV))
+
+def _verify_admission_limits():
+    """
+    Verification is the expensive path. Running plus queued verifications may
+    hold at most threads - 1 of this worker's request threads (GEOVERIFY_THREADS,
+    as in gunicorn.conf.py), so a burst is shed with 429 instead of leaving no
+    thread for marketplace requests. Explicit settings are capped the same way.
+    """
+    threads = int(os.environ.get("GEOVERIFY_THREADS", "4"))
+    budget = max(1, threads - 1)
+    max_active = min(int(os.environ.get("VERIFY_MAX_CONCURRENT", (budget + 1) // 2)), budget)
+    max_waiting = min(int(os.environ.get("VERIFY_MAX_QUEUE", budget - max_active)), budget - max_active)
+    return max(1, max_active), max(0, max_waiting)
+
+_verify_max_active, _verify_max_waiting = _verify_admission_limits()
+verify_admission = AdmissionController(
+    max_active=_verify_max_active,
+    max_waiting=_verify_max_waiting,
+    wait_timeout=float(os.environ.get("VERIFY_QUEUE_TIMEOUT", "2"))
+)
+
+# Gauges are evaluated lazily at scrape time
+metrics.registry.register_gauge('chain_height', 'Number of blocks in the chain',
+                                lambda: service.get_status()['chain_height'])
+metrics.registry.register_gauge('verification_history_size', 'Verifications held by the sentinel',
+                                lambda: service.get_status()['verifications'])
+metrics.registry.register_gauge('active_listings', 'Active marketplace listings',
+                                lambda: service.get_status()['active_listings'])
+metrics.registry.register_gauge('verify_coalesced_total', 'Verifications served from an in-flight duplicate',
+                                lambda: service.get_status()['coalesced_verifications'])
+metrics.registry.register_gauge('verify_rejected_total', 'Verifications shed by admission control (this worker)',
+                                lambda: verify_admission.rejected)
+metrics.registry.register_gauge('verify_queue_depth', 'Verifications waiting for a slot (this worker)',
+                                lambda: verify_admission.waiting)
 
 # Email Configuration (Use environment variables for security)
 # To use Gmail: Create an App Password at https://myaccount.google.com/apppasswords
@@ -25,6 +91,25 @@ SMTP_PORT = 587
 SENDER_EMAIL = os.environ.get("SENDER_EMAIL", "your-email@gmail.com")
 SENDER_PASSWORD = os.environ.get("SENDER_PASSWORD", "your-app-password")
 
+# Bulk exports are written on the server, never to a client-chosen path
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports"))
+
+# Synthetic bulk loads (/api/marketplace/synthetic-load) write generated records
+# into the live marketplace and hold the state lock while they run: off by
+# default, and only for requests carrying SYNTHETIC_ADMIN_TOKEN in X-Admin-Token
+SYNTHETIC_LOAD_ENABLED = os.environ.get("SYNTHETIC_LOAD_ENABLED", "false").lower() in ("1", "true", "yes")
+SYNTHETIC_ADMIN_TOKEN = os.environ.get("SYNTHETIC_ADMIN_TOKEN", "")
+# Upper bound on records per synthetic load request
+SYNTHETIC_MAX_RECORDS = int(os.environ.get("SYNTHETIC_MAX_RECORDS", "50000"))
+
+# On-demand request profiling (send "X-GeoVerify-Profile: sample|cprofile" or ?profile=1);
+# the /api/admin/profiles endpoints also need PROFILING_ADMIN_TOKEN in X-Admin-Token
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_ADMIN_TOKEN = os.environ.get("PROFILING_ADMIN_TOKEN", "")
+profiles = ProfileStore(enabled=PROFILING_ENABLED,
+                        capacity=int(os.environ.get("PROFILING_CAPACITY", "20")))
+
+@metrics.timed('send_real_email')
 def send_real_email(receiver_email, subject, body):
     """Sends an actual email using smtplib"""
     try:
@@ -45,6 +130,35 @@ def send_real_email(receiver_email, subject, body):
         print(f"FAILED TO SEND EMAIL: {e}")
         return False
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if profiles.enabled:
+        mode = request.headers.get('X-GeoVerify-Profile') or request.args.get('profile')
+        if mode and not request.path.startswith('/api/admin/'):
+            g.profile_handle = profiles.start('cprofile' if mode == 'cprofile' else 'sample')
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Use the URL rule rather than the raw path to keep label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.registry.observe_request(request.method, endpoint, response.status_code,
+                                         time.perf_counter() - start)
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        record = profiles.finish(handle, request.method, request.path, response.status_code)
+        response.headers['X-GeoVerify-Profile-Id'] = str(record['profile_id'])
+    return response
+
+@app.teardown_request
+def stop_profile_on_error(error):
+    # after_request is skipped when a view raises, so make sure the sampler is stopped
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        profiles.finish(handle, request.method, request.path, 500)
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -52,6 +166,7 @@ def index():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Returns the health status of the system and its components"""
+    status = service.get_status()
     return jsonify({
         'status': 'HEALTHY',
         'timestamp': time.time(),
@@ -60,32 +175,87 @@ def health_check():
             'blockchain': 'SYNCHRONIZED',
             'marketplace': 'ACTIVE'
         },
+        'chain_height': status['chain_height'],
+        'verifications': status['verifications'],
+        'active_listings': status['active_listings'],
         'version': '2.2.0'
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Exposes latency histograms and gauges in Prometheus text format"""
+    if STATE_IS_REMOTE:
+        metrics.registry.flush()
+        # Histograms from the writer, gauges (some per worker) from here
+        body = service.render_metrics() + metrics.registry.render_prometheus()
+    else:
+        body = metrics.registry.render_prometheus()
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+def _admin_denied(enabled, token, feature):
+    """
+    Error response for an admin endpoint, or None to let the request in: 404
+    while the feature is off or has no token configured, 403 without the
+    matching X-Admin-Token header
+    """
+    if not enabled or not token:
+        return jsonify({'success': False, 'error': f'{feature} is disabled'}), 404
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), token.encode()):
+        return jsonify({'success': False, 'error': 'Admin token required'}), 403
+    return None
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Lists recently captured request profiles"""
+    denied = _admin_denied(profiles.enabled, PROFILING_ADMIN_TOKEN, 'Profiling')
+    if denied:
+        return denied
+    recent = profiles.list_profiles()
+    body = {
+        'success': True,
+        'total_profiles': len(recent),
+        'profiles': recent
+    }
+    if STATE_IS_REMOTE:
+        body['note'] = ('Core components run in the state writer process; profiles cover '
+                        'this worker only. See span_duration_seconds in /api/metrics.')
+    return jsonify(body)
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Returns one profile as collapsed stacks (flamegraph.pl / speedscope input)"""
+    denied = _admin_denied(profiles.enabled, PROFILING_ADMIN_TOKEN, 'Profiling')
+    if denied:
+        return denied
+    profile = profiles.get_profile(profile_id)
+    if not profile:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, 'profile': profile})
+    if request.args.get('format') == 'report' and profile['report']:
+        return Response(profile['report'], mimetype='text/plain')
+    return Response(ProfileStore.collapsed(profile), mimetype='text/plain')
+
+def _verification_overloaded():
+    response = jsonify({'success': False, 'error': 'Verification capacity exceeded, retry later'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(verify_admission.retry_after)
+    return response
+
 @app.route('/api/verify', methods=['POST'])
 def verify_asset():
     data = request.json
     lat = float(data.get('lat', 0))
     lon = float(data.get('lon', 0))
     
-    # 1. AI Verification
-    verification_result = sentinel.verify_location(lat, lon)
-    
-    # 2. Blockchain Recording (Mining)
-    # In a real app, this would be more complex. Here we simulate mining a block for this transaction.
-    last_block = blockchain.get_last_block()
-    proof = last_block['proof'] + 1 # Simplified Proof of Work
-    previous_hash = blockchain.hash(last_block)
-    
-    new_block = blockchain.create_block(proof, previous_hash)
-    new_block['data'].append(verification_result) # Add the data to the block
-    
-    return jsonify({
-        "verification": verification_result,
-        "block_index": new_block['index'],
-        "block_hash": blockchain.hash(new_block)
-    })
+    if not verify_admission.try_acquire():
+        return _verification_overloaded()
+    try:
+        # AI Verification + Blockchain Recording, done atomically by the state owner
+        return jsonify(service.verify_and_record(lat, lon))
+    finally:
+        verify_admission.release()
 
 @app.route('/api/estimate', methods=['POST'])
 def estimate_credits():
@@ -93,8 +263,13 @@ def estimate_credits():
     lat = float(data.get('lat', 0))
     lon = float(data.get('lon', 0))
     
-    # AI Verification (Estimation only)
-    estimation = sentinel.verify_location(lat, lon)
+    if not verify_admission.try_acquire():
+        return _verification_overloaded()
+    try:
+        # AI Verification (Estimation only)
+        estimation = service.estimate(lat, lon)
+    finally:
+        verify_admission.release()
     
     return jsonify({
         "estimation": estimation
@@ -103,28 +278,12 @@ def estimate_credits():
 
 @app.route('/api/chain', methods=['GET'])
 def get_chain():
-    response = {
-        'chain': blockchain.chain,
-        'length': len(blockchain.chain)
-    }
-    return jsonify(response)
+    return jsonify(service.get_chain())
 
 @app.route('/api/audit-log', methods=['GET'])
 def get_audit_log():
     """Returns a detailed audit log of all blockchain transactions"""
-    audit_entries = []
-    
-    for block in blockchain.chain:
-        for data_entry in block.get('data', []):
-            audit_entries.append({
-                'timestamp': block['timestamp'],
-                'block_index': block['index'],
-                'block_hash': blockchain.hash(block)[:16] + '...',
-                'location': f"({data_entry.get('latitude', 'N/A')}, {data_entry.get('longitude', 'N/A')})",
-                'status': data_entry.get('status', 'UNKNOWN'),
-                'carbon_credits': data_entry.get('carbon_credits', 0),
-                'green_cover': data_entry.get('green_cover_percentage', 0)
-            })
+    audit_entries = service.get_audit_log()
     
     return jsonify({
         'total_entries': len(audit_entries),
@@ -135,7 +294,7 @@ def get_audit_log():
 def get_sentinel_log():
     """Returns sentinel verification activity logs"""
     # Get verification history from sentinel
-    sentinel_logs = sentinel.get_verification_history()
+    sentinel_logs = service.get_verification_history()
     
     return jsonify({
         'total_verifications': len(sentinel_logs),
@@ -144,13 +303,40 @@ def get_sentinel_log():
         'ai_model_version': '2.1.0'
     })
 
+@app.route('/api/export', methods=['POST'])
+def export_audit_trail():
+    """
+    Writes chain blocks, verification results and trades to Parquet / Arrow IPC
+    (or gzipped CSV when pyarrow is unavailable) under EXPORT_DIR.
+    Body: format, datasets, start_block, end_block, since, until, incremental
+    """
+    data = request.json or {}
+    try:
+        manifest = service.export_audit_trail(
+            EXPORT_DIR,
+            file_format=data.get('format', 'parquet'),
+            datasets=data.get('datasets'),
+            start_block=data.get('start_block'),
+            end_block=data.get('end_block'),
+            since=data.get('since'),
+            until=data.get('until'),
+            incremental=bool(data.get('incremental', False))
+        )
+    except (TypeError, ValueError) as e:  # TypeError: e.g. a JSON object where a list was expected
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'export': manifest
+    })
+
 # ============ MARKETPLACE API ENDPOINTS ============
 
 @app.route('/api/marketplace/register', methods=['POST'])
 def register_company():
     """Register a company on the marketplace"""
     data = request.json
-    company_id = marketplace.register_company(
+    company_id = service.register_company(
         company_name=data.get('company_name'),
         industry=data.get('industry'),
         country=data.get('country'),
@@ -172,7 +358,7 @@ def send_inquiry():
     buyer_id = data.get('buyer_id')
     
     # 1. Get info from logic layer
-    result = marketplace.send_inquiry(listing_id, buyer_id)
+    result = service.send_inquiry(listing_id, buyer_id)
     
     if result.get('success'):
         # 2. Try to send real email
@@ -198,33 +384,68 @@ GeoVerify Sentinel System
             
     return jsonify(result)
 
+def _finite_numbers(data, *keys):
+    """float() of each key, or None if any is missing, not a number, NaN or infinite"""
+    try:
+        values = [float(data.get(key)) for key in keys]
+    except (TypeError, ValueError):
+        return None
+    return values if all(math.isfinite(v) for v in values) else None
+
 @app.route('/api/marketplace/create-listing', methods=['POST'])
 def create_listing():
     """Create a new carbon credit listing"""
     data = request.json
+    amounts = _finite_numbers(data, 'credit_amount', 'price_per_credit')
+    if amounts is None:
+        return jsonify({'success': False, 'error': 'credit_amount and price_per_credit must be finite numbers'}), 400
     
-    result = marketplace.create_listing(
+    result = service.create_listing(
         seller_id=data.get('seller_id'),
-        credit_amount=float(data.get('credit_amount')),
-        price_per_credit=float(data.get('price_per_credit')),
+        credit_amount=amounts[0],
+        price_per_credit=amounts[1],
         verification_data=data.get('verification_data', {}),
         location=data.get('location', 'Unknown'),
-        description=data.get('description', '')
+        description=data.get('description', ''),
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude')
     )
     
     return jsonify(result)
 
 @app.route('/api/marketplace/listings', methods=['GET'])
 def get_marketplace_listings():
-    """Get all active marketplace listings"""
+    """
+    Get all active marketplace listings.
+    Geo filters: bbox=min_lat,min_lon,max_lat,max_lon and/or lat=..&lon=..&radius_km=..
+    """
     filters = {}
     
-    if request.args.get('max_price'):
-        filters['max_price'] = float(request.args.get('max_price'))
-    if request.args.get('min_amount'):
-        filters['min_amount'] = float(request.args.get('min_amount'))
+    try:
+        if request.args.get('max_price'):
+            filters['max_price'] = float(request.args.get('max_price'))
+        if request.args.get('min_amount'):
+            filters['min_amount'] = float(request.args.get('min_amount'))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'max_price and min_amount must be numbers'}), 400
+    if request.args.get('bbox'):
+        try:
+            bbox = [float(v) for v in request.args.get('bbox').split(',')]
+        except ValueError:
+            bbox = []
+        if len(bbox) != 4:
+            return jsonify({'success': False, 'error': 'bbox must be min_lat,min_lon,max_lat,max_lon'}), 400
+        filters['bbox'] = tuple(bbox)
+    if request.args.get('radius_km'):
+        if not request.args.get('lat') or not request.args.get('lon'):
+            return jsonify({'success': False, 'error': 'radius_km requires lat and lon'}), 400
+        try:
+            filters['near'] = (float(request.args.get('lat')), float(request.args.get('lon')),
+                               float(request.args.get('radius_km')))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'lat, lon and radius_km must be numbers'}), 400
     
-    listings = marketplace.get_active_listings(filters if filters else None)
+    listings = service.get_active_listings(filters if filters else None)
     
     return jsonify({
         'success': True,
@@ -232,15 +453,38 @@ def get_marketplace_listings():
         'listings': listings
     })
 
+@app.route('/api/marketplace/search', methods=['GET'])
+def search_marketplace():
+    """Ranked, paginated full-text search over listings and companies"""
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'all')
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing search query (q)'}), 400
+    if kind not in ('all', 'listings', 'companies'):
+        return jsonify({'success': False, 'error': 'type must be all, listings or companies'}), 400
+    
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', 20))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'page and per_page must be integers'}), 400
+    
+    result = service.search(query, kind, page, per_page)
+    result['success'] = True
+    return jsonify(result)
+
 @app.route('/api/marketplace/buy', methods=['POST'])
 def buy_credits():
     """Create a buy order for carbon credits"""
     data = request.json
+    amounts = _finite_numbers(data, 'credit_amount', 'max_price_per_credit')
+    if amounts is None:
+        return jsonify({'success': False, 'error': 'credit_amount and max_price_per_credit must be finite numbers'}), 400
     
-    result = marketplace.create_buy_order(
+    result = service.create_buy_order(
         buyer_id=data.get('buyer_id'),
-        credit_amount=float(data.get('credit_amount')),
-        max_price_per_credit=float(data.get('max_price_per_credit'))
+        credit_amount=amounts[0],
+        max_price_per_credit=amounts[1]
     )
     
     return jsonify(result)
@@ -250,7 +494,7 @@ def get_transactions():
     """Get marketplace transaction history"""
     company_id = request.args.get('company_id')
     
-    transactions = marketplace.get_transaction_history(company_id)
+    transactions = service.get_transaction_history(company_id)
     
     return jsonify({
         'success': True,
@@ -261,7 +505,7 @@ def get_transactions():
 @app.route('/api/marketplace/stats', methods=['GET'])
 def get_market_stats():
     """Get overall marketplace statistics"""
-    stats = marketplace.get_market_stats()
+    stats = service.get_market_stats()
     
     return jsonify({
         'success': True,
@@ -271,7 +515,7 @@ def get_market_stats():
 @app.route('/api/marketplace/intelligence', methods=['GET'])
 def get_market_intelligence():
     """Get live market prices and price history"""
-    intel = marketplace.get_market_intelligence()
+    intel = service.get_market_intelligence()
     return jsonify({
         'success': True,
         'intelligence': intel
@@ -281,7 +525,7 @@ def get_market_intelligence():
 def predict_footprint():
     """Predict company footprint based on production data"""
     data = request.json
-    result = marketplace.predict_carbon_footprint(data)
+    result = service.predict_carbon_footprint(data)
     return jsonify({
         'success': True,
         'prediction': result
@@ -290,7 +534,7 @@ def predict_footprint():
 @app.route('/api/marketplace/company/<company_id>', methods=['GET'])
 def get_company_profile(company_id):
     """Get company profile and trading history"""
-    profile = marketplace.get_company_profile(company_id)
+    profile = service.get_company_profile(company_id)
     
     if not profile:
         return jsonify({'success': False, 'error': 'Company not found'}), 404
@@ -303,7 +547,7 @@ def get_company_profile(company_id):
 @app.route('/api/marketplace/companies', methods=['GET'])
 def get_all_companies():
     """Get all registered companies"""
-    companies_list = list(marketplace.companies.values())
+    companies_list = service.get_companies()
     return jsonify({
         'success': True,
         'total_companies': len(companies_list),
@@ -319,7 +563,7 @@ def marketplace_page():
 def init_demo_data():
     """Initialize demo data for the marketplace"""
     # Register demo companies
-    company1 = marketplace.register_company(
+    company1 = service.register_company(
         "GreenTech Industries",
         "Manufacturing",
         "India",
@@ -327,7 +571,7 @@ def init_demo_data():
         "contact@greentech.io"
     )
     
-    company2 = marketplace.register_company(
+    company2 = service.register_company(
         "EcoForest Solutions",
         "Forestry",
         "Brazil",
@@ -335,7 +579,7 @@ def init_demo_data():
         "info@ecoforest.br"
     )
     
-    company3 = marketplace.register_company(
+    company3 = service.register_company(
         "CleanEnergy Corp",
         "Energy",
         "Germany",
@@ -344,7 +588,7 @@ def init_demo_data():
     )
     
     # Create demo listings
-    marketplace.create_listing(
+    service.create_listing(
         seller_id=company2,
         credit_amount=150.5,
         price_per_credit=28.50,
@@ -353,7 +597,7 @@ def init_demo_data():
         description="Premium verified carbon credits from protected rainforest area"
     )
     
-    marketplace.create_listing(
+    service.create_listing(
         seller_id=company3,
         credit_amount=200.0,
         price_per_credit=32.00,
@@ -362,7 +606,7 @@ def init_demo_data():
         description="High-quality credits from renewable energy production"
     )
     
-    marketplace.create_listing(
+    service.create_listing(
         seller_id=company2,
         credit_amount=75.25,
         price_per_credit=25.00,
@@ -377,6 +621,48 @@ def init_demo_data():
         'companies': [company1, company2, company3]
     })
 
+@app.route('/api/marketplace/synthetic-load', methods=['POST'])
+def synthetic_load():
+    """
+    Bulk-loads a generated workload for capacity testing (see core/workload.py).
+    Requires SYNTHETIC_LOAD_ENABLED and the X-Admin-Token header.
+    Body: companies, verifications, listings, orders, seed, batch_size, entries_per_block
+    """
+    denied = _admin_denied(SYNTHETIC_LOAD_ENABLED, SYNTHETIC_ADMIN_TOKEN, 'Synthetic load')
+    if denied:
+        return denied
+    
+    data = request.json or {}
+    try:
+        options = {
+            key: int(data.get(key, default))
+            for key, default in (('companies', 1000), ('verifications', 1000),
+                                 ('listings', 1000), ('orders', 1000),
+                                 ('batch_size', 10000), ('entries_per_block', 1000))
+        }
+        options['seed'] = int(data['seed']) if data.get('seed') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Counts must be integers'}), 400
+    
+    requested = sum(options[k] for k in ('companies', 'verifications', 'listings', 'orders'))
+    if requested > SYNTHETIC_MAX_RECORDS:
+        return jsonify({
+            'success': False,
+            'error': f'At most {SYNTHETIC_MAX_RECORDS} records per load'
+        }), 400
+    if options['batch_size'] < 1 or options['entries_per_block'] < 1:
+        return jsonify({'success': False, 'error': 'batch_size and entries_per_block must be positive'}), 400
+    
+    try:
+        report = service.load_synthetic_workload(**options)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({
+        'success': True,
+        'report': report
+    })
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
 
@@ -0,0 +1,62 @@
+"""
+Memory of 1M records per type: plain dicts (the old representation) versus
+the slotted record classes in core/. Both totals include the 8 B/record
+list that holds them.
+
+    python benchmarks/bench_records_memory.py [--count 1000000]
+
+Field values are built before measuring and shared by both forms, so the
+numbers are the per-record container cost that the record classes change.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blockchain import Block
+from core.marketplace import Company, Listing, Order, Transaction
+from core.verifier import VerificationResult
+
+RECORD_TYPES = [Block, VerificationResult, Company, Listing, Order, Transaction]
+
+
+def _values(record_type, count):
+    """One tuple of field values per record, with unique ids"""
+    fields = record_type.__slots__
+    template = [f"{field}-value" for field in fields]
+    return [(f"{record_type.__name__}-{i}", *template[1:]) for i in range(count)]
+
+
+def _measure(build, values):
+    gc.collect()
+    tracemalloc.start()
+    built = build(values)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'record':<20}{'dict MiB':>10}{'slots MiB':>11}{'dict B/rec':>12}"
+          f"{'slots B/rec':>13}{'saved':>8}")
+    for record_type in RECORD_TYPES:
+        fields = record_type.__slots__
+        values = _values(record_type, args.count)
+        as_dicts = _measure(lambda rows: [dict(zip(fields, row)) for row in rows], values)
+        as_records = _measure(lambda rows: [record_type.from_tuple(row) for row in rows], values)
+        del values
+        print(f"{record_type.__name__:<20}{as_dicts / 2**20:>10.1f}{as_records / 2**20:>11.1f}"
+              f"{as_dicts / args.count:>12.0f}{as_records / args.count:>13.0f}"
+              f"{1 - as_records / as_dicts:>8.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Marketplace restart time at 1M events: full replay of the event log versus
+the newest snapshot plus the log tail, and how long the command that
+triggers a snapshot holds up its caller.
+
+    python benchmarks/bench_restart.py [--events 1000000] [--snapshot-every 100000]
+
+The log is built through the marketplace commands (register_company,
+create_listing, execute_transaction), except that buy orders are recorded
+without running the matcher, which scans every active listing per order.
+Events: the companies first, then 45% listings, 45% orders and 10% trades.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blockchain import Blockchain
+from core.eventstore import EventStore, LOG_FILE
+from core.marketplace import CarbonMarketplace
+from core.workload import WorkloadGenerator
+
+
+def _build(directory, events, companies, snapshot_every, seed):
+    """Writes the event log; returns (seconds, events, command latencies, snapshot-triggering latencies)"""
+    store = EventStore(directory, snapshot_every=snapshot_every, keep_snapshots=100)
+    marketplace = CarbonMarketplace(Blockchain(), store)
+    generator = WorkloadGenerator(seed)
+    rng = generator.random
+    latencies, stalls = [], []
+
+    def timed(command, *args, **kwargs):
+        before = marketplace.event_sequence
+        start = time.perf_counter()
+        command(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        if snapshot_every and marketplace.event_sequence // snapshot_every > before // snapshot_every:
+            stalls.append(elapsed)
+
+    def place_order(buyer_id):
+        order = generator.order(buyer_id)
+        marketplace._record('ORDER_PLACED', dict(order, order_id=f"ORD-{marketplace.order_id_counter}",
+                                                 created_at=time.time()))
+
+    start = time.perf_counter()
+    for company in generator.companies(companies):
+        timed(marketplace.register_company, company['name'], company['industry'],
+              company['country'], company['wallet_address'])
+    company_ids = list(marketplace.companies)
+    listing_ids = []
+    coordinates = generator.coordinates(events)
+    while marketplace.event_sequence < events:
+        kind = rng.random()
+        if kind < 0.45 or not listing_ids:
+            region, lat, lon = next(coordinates)
+            listing = generator.listing(rng.choice(company_ids), region, lat, lon)
+            timed(marketplace.create_listing, **listing)
+            listing_ids.append(marketplace.listings[-1].listing_id)
+        elif kind < 0.90:
+            timed(place_order, rng.choice(company_ids))
+        else:
+            listing = marketplace.listings_by_id[rng.choice(listing_ids)]
+            if listing.status != 'ACTIVE':
+                continue
+            amount = min(listing.available_amount, round(rng.uniform(1, 50), 2))
+            timed(marketplace.execute_transaction, rng.choice(company_ids), listing.seller_id,
+                  listing.listing_id, amount, listing.price_per_credit)
+    store.close()  # waits for a snapshot still being written
+    return time.perf_counter() - start, marketplace.event_sequence, latencies, stalls
+
+
+def _restart(directory):
+    start = time.perf_counter()
+    marketplace = CarbonMarketplace(Blockchain(), EventStore(directory))
+    return time.perf_counter() - start, marketplace.event_sequence
+
+
+def _with_files(source, target, names):
+    os.makedirs(target)
+    for name in names:
+        os.link(os.path.join(source, name), os.path.join(target, name))
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--companies', type=int, default=10_000)
+    parser.add_argument('--snapshot-every', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='geoverify-restart-')
+    try:
+        data = os.path.join(workdir, 'data')
+        seconds, sequence, latencies, stalls = _build(data, args.events, args.companies,
+                                                      args.snapshot_every, args.seed)
+        latencies.sort()
+        print(f"built {sequence} events in {seconds:.1f} s")
+        print(f"command latency: p50 {latencies[len(latencies) // 2] * 1000:.3f} ms, "
+              f"p99.9 {latencies[int(len(latencies) * 0.999)] * 1000:.3f} ms, "
+              f"max {latencies[-1] * 1000:.1f} ms")
+        if stalls:
+            print(f"snapshot-triggering commands ({len(stalls)}): "
+                  f"max {max(stalls) * 1000:.1f} ms, mean {sum(stalls) / len(stalls) * 1000:.1f} ms")
+
+        snapshots = sorted(name for name in os.listdir(data) if name.startswith('snapshot-'))
+        print(f"snapshots written: {len(snapshots)}")
+        scenarios = [('full replay, no snapshots', [LOG_FILE])]
+        if snapshots:
+            newest = int(snapshots[-1][len('snapshot-'):-len('.bin')])
+            scenarios.append((f"snapshot at {newest} + {sequence - newest} tail",
+                              [LOG_FILE, snapshots[-1]]))
+            if len(snapshots) > 1:
+                previous = int(snapshots[-2][len('snapshot-'):-len('.bin')])
+                scenarios.append((f"snapshot at {previous} + {sequence - previous} tail",
+                                  [LOG_FILE, snapshots[-2]]))
+
+        for number, (name, files) in enumerate(scenarios):
+            restart_seconds, restored = _restart(_with_files(data, os.path.join(workdir, str(number)), files))
+            assert restored == sequence
+            print(f"  {name:<40}{restart_seconds:>8.1f} s")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
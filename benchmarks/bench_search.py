@@ -0,0 +1,82 @@
+"""
+Listing search latency at scale: single- and multi-term queries over a
+synthetic book of active listings, on a quiet index and with a listing
+added and one sold out before every query.
+
+    python benchmarks/bench_search.py [--listings 100000] [--runs 200]
+
+The first query of each term builds its ranked list; that cold cost is
+reported on its own and kept out of the percentiles.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blockchain import Blockchain
+from core.marketplace import CarbonMarketplace
+from core.verifier import GeoSentinel
+from core.workload import load_workload
+
+QUERIES = ['amazon', 'reforestation', 'amazon basin', 'reforestation project',
+           'mangrove restoration borneo', 'protected rainforest congo']
+
+
+def _ms(seconds):
+    return seconds * 1000
+
+
+def _timed_search(marketplace, query):
+    start = time.perf_counter()
+    marketplace.search(query, 'listings', 1, 20)
+    return time.perf_counter() - start
+
+
+def _churn(marketplace, rng, sellers, number):
+    """One new listing in a busy region and one existing listing sold out"""
+    marketplace.create_listing(rng.choice(sellers), 10.0, 25.0, {},
+                               f"Amazon Basin plot {number}",
+                               "Reforestation project in Amazon Basin")
+    listing_id = rng.choice(list(marketplace.active_listings))
+    marketplace._deactivate_listing(marketplace.listings_by_id[listing_id], 'SOLD_OUT')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--listings', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    marketplace = CarbonMarketplace(Blockchain())
+    load_workload(marketplace.blockchain, GeoSentinel(), marketplace, companies=10_000,
+                  verifications=0, listings=args.listings, orders=0, seed=args.seed)
+    rng = random.Random(args.seed)
+    sellers = list(marketplace.companies)
+
+    print(f"{len(marketplace.active_listings)} active listings, {args.runs} runs per query")
+    print(f"{'query':<30}{'matches':>9}{'cold ms':>9}{'p50 ms':>8}{'p99 ms':>8}"
+          f"{'churn p50':>11}{'churn p99':>11}")
+    number = 0
+    for query in QUERIES:
+        cold = _timed_search(marketplace, query)
+        total = marketplace.search(query, 'listings', 1, 20)['total']
+        quiet = sorted(_timed_search(marketplace, query) for _ in range(args.runs))
+        churn = []
+        for _ in range(args.runs):
+            _churn(marketplace, rng, sellers, number)
+            number += 1
+            churn.append(_timed_search(marketplace, query))
+        churn.sort()
+        p99 = max(0, int(args.runs * 0.99) - 1)
+        print(f"{query:<30}{total:>9}{_ms(cold):>9.2f}{_ms(statistics.median(quiet)):>8.2f}"
+              f"{_ms(quiet[p99]):>8.2f}{_ms(statistics.median(churn)):>11.2f}"
+              f"{_ms(churn[p99]):>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
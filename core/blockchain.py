@@ -1,34 +1,71 @@
 import hashlib
-import json
 import time
 
+from core.metrics import timed
+from core.records import Record
+from core.serialization import canonical_bytes, CANONICAL_VERSION
+
+class Block(Record):
+    """A chain block; data holds the JSON payloads recorded in it"""
+    __slots__ = ('index', 'timestamp', 'proof', 'previous_hash', 'data')
+
+    def __init__(self, index, timestamp, proof, previous_hash, data=None):
+        self.index = index
+        self.timestamp = timestamp
+        self.proof = proof
+        self.previous_hash = previous_hash
+        self.data = data if data is not None else []  # List of verified assets
+
+    @classmethod
+    def from_dict(cls, block):
+        return cls(block['index'], block['timestamp'], block['proof'],
+                   block['previous_hash'], list(block.get('data', [])))
+
 class Blockchain:
-    def __init__(self):
+    def __init__(self, hash_version=CANONICAL_VERSION):
         self.chain = []
+        # Canonical encoding used for block hashes; see core/serialization.py
+        self.hash_version = hash_version
         self.create_block(proof=1, previous_hash='0')
 
+    @timed('blockchain.create_block')
     def create_block(self, proof, previous_hash):
-        block = {
-            'index': len(self.chain) + 1,
-            'timestamp': time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
-            'proof': proof,
-            'previous_hash': previous_hash,
-            'data': [] # List of verified assets
-        }
+        block = Block(
+            index=len(self.chain) + 1,
+            timestamp=time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+            proof=proof,
+            previous_hash=previous_hash
+        )
         self.chain.append(block)
         return block
 
     def get_last_block(self):
         return self.chain[-1]
 
+    def append_entries(self, entries, entries_per_block=1000):
+        """
+        Bulk-ingest path: packs payloads into blocks of up to entries_per_block
+        instead of mining one block per record. Returns the new blocks.
+        """
+        blocks = []
+        for start in range(0, len(entries), entries_per_block):
+            last_block = self.get_last_block()
+            block = self.create_block(last_block.proof + 1, self.hash(last_block))
+            block.data.extend(entries[start:start + entries_per_block])
+            blocks.append(block)
+        return blocks
+
     def add_verification(self, verification_data):
         """Adds a verification record to the current block (or a buffer)"""
         # For simplicity in this efficiency demo, we add to the last block or create new one on demand
         # Here we'll just return the data structure to be added to a new block mining simulation
         return verification_data
 
+    @timed('blockchain.hash')
     def hash(self, block):
-        encoded_block = json.dumps(block, sort_keys=True).encode()
+        # Always recomputed from the block contents: validation and the audit
+        # trail must see any change made to a block after it was mined
+        encoded_block = canonical_bytes(block, self.hash_version)
         return hashlib.sha256(encoded_block).hexdigest()
 
     def is_chain_valid(self, chain):
@@ -36,7 +73,7 @@ class Blockchain:
         block_index = 1
         while block_index < len(chain):
             block = chain[block_index]
-            if block['previous_hash'] != self.hash(previous_block):
+            if block.previous_hash != self.hash(previous_block):
                 return False
             previous_block = block
             block_index += 1
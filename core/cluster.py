@@ -0,0 +1,119 @@
+"""
+Production deployment support: one writer process owns all GeoVerify state
+and stateless request workers (e.g. gunicorn) reach it over local IPC.
+
+    python -m core.cluster                # run the writer in the foreground
+    gunicorn -c gunicorn.conf.py app:app  # writer + 4 workers
+
+Workers find the writer through GEOVERIFY_STATE_ADDRESS (a unix socket path,
+or host:port on platforms without unix sockets) and GEOVERIFY_STATE_AUTHKEY.
+"""
+import multiprocessing
+import os
+import secrets
+import socket
+import sys
+import tempfile
+import time
+from multiprocessing.managers import BaseManager
+
+from core.service import GeoVerifyService, DATA_DIR_ENV
+
+ADDRESS_ENV = 'GEOVERIFY_STATE_ADDRESS'
+AUTHKEY_ENV = 'GEOVERIFY_STATE_AUTHKEY'
+
+# Set only inside the writer process
+_service = None
+
+
+def _get_service():
+    return _service
+
+
+class StateManager(BaseManager):
+    """Serves the writer's GeoVerifyService; each worker gets a proxy to the same instance"""
+
+
+StateManager.register('service', callable=_get_service)
+
+
+def default_address():
+    if sys.platform == 'win32':
+        return '127.0.0.1:50505'
+    return os.path.join(tempfile.gettempdir(), f'geoverify-state-{os.getpid()}.sock')
+
+
+def parse_address(address):
+    """'host:port' becomes a TCP address, anything else is a unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return (host, int(port))
+    return address
+
+
+def _remove_stale_socket(address):
+    """A terminated writer leaves its unix socket behind; drop it unless something still listens"""
+    if not isinstance(address, str) or not os.path.exists(address):
+        return
+    probe = socket.socket(socket.AF_UNIX)
+    try:
+        probe.connect(address)
+    except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(address)
+    else:
+        raise RuntimeError(f'Another GeoVerify state writer is listening on {address}')
+    finally:
+        probe.close()
+
+
+def _serve(address, authkey, ready):
+    global _service
+    _remove_stale_socket(parse_address(address))
+    _service = GeoVerifyService(data_dir=os.environ.get(DATA_DIR_ENV))
+    manager = StateManager(address=parse_address(address), authkey=authkey)
+    server = manager.get_server()
+    ready.set()
+    server.serve_forever()
+
+
+def start_writer(address=None, authkey=None):
+    """
+    Starts the single writer process and exports its address and authkey
+    through the environment so that forked workers can connect.
+    Returns the process handle.
+    """
+    address = address or os.environ.get(ADDRESS_ENV) or default_address()
+    authkey = authkey or os.environ.get(AUTHKEY_ENV) or secrets.token_hex(16)
+
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(address, authkey.encode(), ready),
+                                      name='geoverify-writer', daemon=True)
+    process.start()
+    deadline = time.monotonic() + 30
+    while not ready.wait(timeout=0.1):
+        if not process.is_alive() or time.monotonic() > deadline:
+            process.terminate()
+            raise RuntimeError('GeoVerify state writer failed to start')
+
+    os.environ[ADDRESS_ENV] = address
+    os.environ[AUTHKEY_ENV] = authkey
+    return process
+
+
+def connect(address=None, authkey=None):
+    """Returns a proxy to the writer's GeoVerifyService"""
+    address = address or os.environ[ADDRESS_ENV]
+    authkey = authkey or os.environ[AUTHKEY_ENV]
+    manager = StateManager(address=parse_address(address), authkey=authkey.encode())
+    manager.connect()
+    return manager.service()
+
+
+if __name__ == '__main__':
+    address = os.environ.get(ADDRESS_ENV) or default_address()
+    authkey = os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        authkey = secrets.token_hex(16)
+        print(f"{AUTHKEY_ENV}={authkey}")
+    print(f"{ADDRESS_ENV}={address}")
+    _serve(address, authkey.encode(), multiprocessing.Event())
@@ -0,0 +1,92 @@
+import math
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function, everyone who arrives while it is running gets the same result.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Returns (result, shared) where shared is True for callers that joined an in-flight call"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AdmissionController:
+    """
+    Bounds concurrent work: up to max_active callers run, up to max_waiting
+    more wait (at most wait_timeout seconds) for a slot, the rest are shed.
+    """
+    def __init__(self, max_active, max_waiting, wait_timeout):
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(max_active)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.rejected = 0
+
+    @property
+    def retry_after(self):
+        """Suggested Retry-After (seconds) for shed requests"""
+        return max(1, math.ceil(self.wait_timeout))
+
+    def try_acquire(self):
+        if self._slots.acquire(blocking=False):
+            return True
+        with self._lock:
+            if self.waiting >= self.max_waiting:
+                self.rejected += 1
+                return False
+            self.waiting += 1
+        try:
+            admitted = self._slots.acquire(timeout=self.wait_timeout)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if not admitted:
+            with self._lock:
+                self.rejected += 1
+        return admitted
+
+    def release(self):
+        self._slots.release()
@@ -0,0 +1,261 @@
+import glob
+import os
+import pickle
+import struct
+import sys
+import threading
+import traceback
+import zlib
+
+from core import serialization
+
+LOG_FILE = 'events.log'
+SNAPSHOT_PATTERN = 'snapshot-*.bin'
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_CHUNK_ITEMS = 1000  # ~ a few ms of pickling per GIL hold
+_SNAPSHOT_MAGIC = b'GEOVERIFY-SNAPSHOT\n'  # older snapshots were one bare pickle
+_RECORD_HEADER = struct.Struct('<Q')  # byte length of each pickled snapshot record
+_CAN_FORK = hasattr(os, 'fork')  # not on Windows
+
+
+class EventStore:
+    """
+    Append-only event log (one JSON event per line) plus periodic binary snapshots.
+
+    Snapshots are zlib-compressed streams of length-prefixed pickles of the
+    projected state, named after the sequence number of the last event they
+    include, so a restart loads the newest snapshot and replays only the
+    events after it (seeking straight to the log offset recorded with the
+    snapshot). A torn final line (crash mid-write) is ignored on load and cut
+    off before the next append. Loading also stops at a line that does not
+    decode; the log is then truncated there, dropping the events after it,
+    rather than failing every restart.
+
+    Snapshots are written off the caller's path: by a forked child process
+    where fork is available, otherwise by a background thread. Lists in the
+    state are pickled SNAPSHOT_CHUNK_ITEMS at a time: in the thread, the
+    pickler holds the GIL for a whole dumps() call, and small calls let
+    request threads run in between, so list items should be small too.
+    """
+    def __init__(self, directory, snapshot_every=100_000, keep_snapshots=2, fsync=False):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._log_path = os.path.join(directory, LOG_FILE)
+        self._log = None
+        self._valid_length = None  # set by a load that stopped at a torn or undecodable line
+        self._snapshot_thread = None
+        self._snapshot_pid = None
+
+    def _snapshot_paths(self):
+        return sorted(glob.glob(os.path.join(self.directory, SNAPSHOT_PATTERN)))
+
+    def load(self):
+        """Returns (snapshot_state or None, events after the snapshot as an iterator)"""
+        state, sequence, offset = None, 0, 0
+        for path in reversed(self._snapshot_paths()):
+            try:
+                with open(path, 'rb') as f:
+                    header, loaded = self._read_snapshot(zlib.decompress(f.read()))
+            except (OSError, zlib.error, struct.error, pickle.UnpicklingError, EOFError):
+                continue  # fall back to an older snapshot
+            if loaded is not None:
+                state, sequence, offset = loaded, header['sequence'], header['log_offset']
+                break
+        return state, self._read_events(after=sequence, offset=offset)
+
+    @staticmethod
+    def _snapshot_records(data):
+        """Unpickles the length-prefixed records of a snapshot stream"""
+        view = memoryview(data)
+        position = len(_SNAPSHOT_MAGIC)
+        while position < len(view):
+            (size,) = _RECORD_HEADER.unpack_from(view, position)
+            position += _RECORD_HEADER.size
+            yield pickle.loads(view[position:position + size])
+            position += size
+
+    def _read_snapshot(self, data):
+        """Returns (header, state), with state None for another snapshot format"""
+        if not data.startswith(_SNAPSHOT_MAGIC):
+            return None, None
+        records = self._snapshot_records(data)
+        header = next(records)
+        if not isinstance(header, dict) or header.get('format') != SNAPSHOT_FORMAT_VERSION:
+            return header, None
+        state = {}
+        for record in records:
+            if record[0] == 'end':
+                return header, state
+            op, path, value = record
+            target = state
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            if op == 'set':
+                target[path[-1]] = value
+            else:  # 'extend'
+                target[path[-1]].extend(value)
+        raise EOFError("Snapshot ends before its end record")
+
+    def _read_events(self, after, offset=0):
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, 'rb') as f:
+            # The offset is only a hint; a log shorter than it gets a full scan
+            if offset <= os.path.getsize(self._log_path):
+                f.seek(offset)
+            position = f.tell()
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("torn write at the tail")
+                    event = serialization.loads(line)
+                    sequence = event['seq']
+                except (ValueError, TypeError, KeyError):
+                    self._valid_length = position
+                    break
+                position += len(line)
+                if sequence > after:
+                    yield event
+
+    def _open_log(self):
+        log = open(self._log_path, 'a+b')
+        # Drop a torn tail so the next event starts on its own line
+        size = log.seek(0, os.SEEK_END)
+        keep = self._valid_length if self._valid_length is not None else self._last_line_end(log, size)
+        if keep < size:
+            log.truncate(keep)
+        return log
+
+    @staticmethod
+    def _last_line_end(f, size):
+        """Offset just past the last newline; bulk events run to megabytes, so scan back as far as it takes"""
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            cut = f.read(end - start).rfind(b'\n')
+            if cut >= 0:
+                return start + cut + 1
+            end = start
+        return 0
+
+    def append(self, event):
+        """Writes one event line; raises ValueError, before writing, for NaN or Infinity"""
+        line = serialization.dumps_strict(event) + b'\n'
+        if self._log is None:
+            self._log = self._open_log()
+        self._log.write(line)
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def should_snapshot(self, sequence):
+        """
+        Whether a snapshot is due after event `sequence`. Never while the
+        previous one is still being written: that one is skipped, and the next
+        one due covers it.
+        """
+        if self._snapshot_running():
+            return False
+        return self.snapshot_every and sequence % self.snapshot_every == 0
+
+    def write_snapshot(self, sequence, state, log_offset=None):
+        """
+        Writes a snapshot of state, which must hold the projection after event
+        `sequence` and only dicts, lists and values no one else mutates.
+        """
+        if log_offset is None:
+            log_offset = self._log.tell() if self._log is not None else 0
+        path = os.path.join(self.directory, f"snapshot-{sequence:012d}.bin")
+        compressor = zlib.compressobj(1)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(compressor.compress(_SNAPSHOT_MAGIC))
+
+            def write(record):
+                data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+                f.write(compressor.compress(_RECORD_HEADER.pack(len(data))))
+                f.write(compressor.compress(data))
+
+            write({'format': SNAPSHOT_FORMAT_VERSION, 'sequence': sequence, 'log_offset': log_offset})
+            self._write_sections(write, (), state)
+            write(('end',))
+            f.write(compressor.flush())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+        for old in self._snapshot_paths()[:-self.keep_snapshots]:
+            os.remove(old)
+
+    def _write_sections(self, write, path, state):
+        for key, value in state.items():
+            if isinstance(value, dict) and value:
+                self._write_sections(write, path + (key,), value)
+            elif isinstance(value, list):
+                write(('set', path + (key,), value[:SNAPSHOT_CHUNK_ITEMS]))
+                for start in range(SNAPSHOT_CHUNK_ITEMS, len(value), SNAPSHOT_CHUNK_ITEMS):
+                    write(('extend', path + (key,), value[start:start + SNAPSHOT_CHUNK_ITEMS]))
+            else:
+                write(('set', path + (key,), value))
+
+    def write_snapshot_in_background(self, sequence, capture):
+        """
+        Writes the snapshot of event `sequence` returned by capture() and
+        returns at once. With fork, a child process calls capture() on its
+        copy-on-write view of memory, frozen at this point, so the caller only
+        pays for the fork (milliseconds, where copying the state takes seconds)
+        and the copy needn't be independent of the live state. Without fork,
+        capture() runs here and must return a copy, which a thread then writes.
+        """
+        self.wait_for_snapshot()
+        # The log keeps growing while the snapshot is written; fix the offset now
+        log_offset = self._log.tell() if self._log is not None else 0
+        if _CAN_FORK:
+            pid = os.fork()
+            if pid == 0:  # child: write, then exit without running any of the parent's cleanup
+                try:
+                    self.write_snapshot(sequence, capture(), log_offset)
+                    os._exit(0)
+                except BaseException:
+                    traceback.print_exc()
+                    sys.stderr.flush()
+                finally:
+                    os._exit(1)
+            self._snapshot_pid = pid
+            return
+        self._snapshot_thread = threading.Thread(
+            target=self.write_snapshot, args=(sequence, capture(), log_offset),
+            name='snapshot-writer', daemon=True
+        )
+        self._snapshot_thread.start()
+
+    def _snapshot_running(self):
+        if self._snapshot_pid is not None:
+            try:
+                pid, _ = os.waitpid(self._snapshot_pid, os.WNOHANG)
+            except ChildProcessError:
+                pid = self._snapshot_pid  # already reaped elsewhere
+            if pid == 0:
+                return True
+            self._snapshot_pid = None
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def wait_for_snapshot(self):
+        """Blocks until the snapshot being written in the background, if any, is on disk"""
+        if self._snapshot_pid is not None:
+            try:
+                os.waitpid(self._snapshot_pid, 0)
+            except ChildProcessError:
+                pass
+            self._snapshot_pid = None
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+
+    def close(self):
+        self.wait_for_snapshot()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
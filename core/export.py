@@ -0,0 +1,286 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Columnar formats are optional; compressed CSV always works
+    pa = None
+
+STATE_FILE = 'export_state.json'
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Column layouts of the exported datasets: (column, type)
+SCHEMAS = {
+    'blocks': [
+        ('block_index', 'int'), ('timestamp', 'str'), ('proof', 'int'),
+        ('previous_hash', 'str'), ('block_hash', 'str'), ('entry_count', 'int')
+    ],
+    'verifications': [
+        ('block_index', 'int'), ('latitude', 'float'), ('longitude', 'float'),
+        ('green_cover_percentage', 'float'), ('ai_confidence', 'float'), ('status', 'str'),
+        ('carbon_credits', 'float'), ('reasons', 'str'), ('timestamp', 'float')
+    ],
+    'trades': [
+        ('block_index', 'int'), ('transaction_id', 'str'), ('buyer', 'str'), ('seller', 'str'),
+        ('amount', 'float'), ('price', 'float'), ('total_value', 'float'), ('timestamp', 'float')
+    ]
+}
+
+FORMATS = ('parquet', 'arrow', 'csv')
+_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow', 'csv': 'csv.gz'}
+
+
+def columnar_available():
+    return pa is not None
+
+
+class _CsvWriter:
+    def __init__(self, path, schema):
+        self._file = gzip.open(path, 'wt', newline='', encoding='utf-8')
+        self._columns = [name for name, _ in schema]
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self._columns)
+
+    def write(self, rows):
+        self._writer.writerows([row.get(c) for c in self._columns] for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class _ArrowWriter:
+    """Writes Parquet row groups or Arrow IPC record batches, one per chunk"""
+    _TYPES = {'int': 'int64', 'float': 'float64', 'str': 'string'}
+
+    def __init__(self, path, schema, file_format):
+        self._schema = pa.schema([(name, getattr(pa, self._TYPES[kind])()) for name, kind in schema])
+        if file_format == 'parquet':
+            self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+        self._format = file_format
+
+    def write(self, rows):
+        arrays = [
+            pa.array([row.get(field.name) for row in rows], type=field.type)
+            for field in self._schema
+        ]
+        batch = pa.record_batch(arrays, schema=self._schema)
+        if self._format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+
+def _block_index(value, name):
+    """A start/end block bound as an int: an integer, integral float or numeric string"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value
+    elif isinstance(value, float) and value.is_integer():
+        return int(value)
+    raise ValueError(f"{name} must be a block index, got {value!r}")
+
+
+def _block_timestamp(value, name):
+    """
+    Normalises a since/until bound to the chain's 'YYYY-MM-DD HH:MM:SS' (UTC)
+    format. Accepts epoch seconds (number or numeric string) or an ISO 8601
+    date/time such as '2025-01-31', '2025-01-31T12:00:00' or with 'Z' or an
+    offset; times without an offset are taken as UTC.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be epoch seconds or an ISO 8601 date/time")
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            value = float(text)
+        except ValueError:
+            if text.endswith(('Z', 'z')):
+                text = text[:-1] + '+00:00'
+            try:
+                moment = datetime.datetime.fromisoformat(text)
+            except ValueError:
+                raise ValueError(f"{name} must be epoch seconds or an ISO 8601 date/time, got {value!r}")
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(datetime.timezone.utc)
+            return moment.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (int, float)):
+        try:
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(value))
+        except (OverflowError, OSError, ValueError):
+            raise ValueError(f"{name} is out of range: {value!r}")
+    raise ValueError(f"{name} must be epoch seconds or an ISO 8601 date/time")
+
+
+def _in_window(block, since, until):
+    return not ((since and block.timestamp < since) or (until and block.timestamp > until))
+
+
+def _rows_for_block(blockchain, block):
+    yield 'blocks', {
+        'block_index': block.index,
+        'timestamp': block.timestamp,
+        'proof': block.proof,
+        'previous_hash': block.previous_hash,
+        'block_hash': blockchain.hash(block),
+        'entry_count': len(block.data)
+    }
+    for entry in block.data:
+        entry_type = entry.get('type')
+        if entry_type == 'CARBON_CREDIT_TRADE':
+            yield 'trades', dict(entry, block_index=block.index)
+        elif entry_type is None and 'latitude' in entry:
+            yield 'verifications', dict(entry, block_index=block.index,
+                                        reasons='; '.join(entry.get('reasons', [])))
+
+
+def load_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'last_block_index': 0}
+
+
+def _save_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def export_chain(blockchain, output_dir, file_format='parquet', datasets=None,
+                 start_block=None, end_block=None, since=None, until=None,
+                 incremental=False, chunk_rows=DEFAULT_CHUNK_ROWS, sealed_blocks=None):
+    """
+    Streams chain records, verification results and trades into one file per
+    dataset, flushing every chunk_rows rows so memory stays bounded.
+
+    Blocks are selected by index range and/or block timestamp. With
+    incremental=True the export resumes after the last block recorded in
+    output_dir/export_state.json, and the state only advances once every
+    file has been written. An incremental run never skips a block by time:
+    it stops before the first block after `until` (left for the next run)
+    and refuses a `since` that would pass over blocks not yet exported.
+
+    sealed_blocks is the number of blocks known to be complete, read by the
+    caller under the lock that guards chain writes. Without it the tip is
+    left out, since a writer may still be filling it.
+    Returns a manifest of what was written.
+    """
+    datasets = list(datasets or SCHEMAS)
+    unknown = [d for d in datasets if d not in SCHEMAS]
+    if unknown:
+        raise ValueError(f"Unknown datasets: {', '.join(unknown)}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {file_format}")
+    requested_format = file_format
+    if file_format != 'csv' and not columnar_available():
+        file_format = 'csv'
+
+    os.makedirs(output_dir, exist_ok=True)
+    state = load_state(output_dir)
+
+    start_block, end_block = _block_index(start_block, 'start_block'), _block_index(end_block, 'end_block')
+    since, until = _block_timestamp(since, 'since'), _block_timestamp(until, 'until')
+    if since and until and since > until:
+        raise ValueError("since must not be after until")
+
+    # Blocks are append-only and sealed blocks never change, so fix the end
+    # up front and read without holding up writers
+    chain = blockchain.chain
+    last_index = len(chain) - 1 if sealed_blocks is None else min(sealed_blocks, len(chain))
+    first = max(1, start_block or 1)
+    if incremental:
+        first = max(first, state['last_block_index'] + 1)
+    last = min(last_index, end_block) if end_block else last_index
+
+    if incremental and (since or until) and first <= last:
+        # The resume point must not pass a block the time window left out
+        if not _in_window(chain[first - 1], since, None):
+            raise ValueError(f"Incremental export would skip block {first} and later blocks "
+                             f"before since; export them first or use start_block")
+        for position in range(first - 1, last):
+            if not _in_window(chain[position], since, until):
+                last = position  # index of the block before it
+                break
+
+    manifest = {
+        'format': file_format,
+        'requested_format': requested_format,
+        'start_block': first,
+        'end_block': last,
+        'files': {}
+    }
+    if first > last:
+        manifest['up_to_date'] = True
+        return manifest
+
+    suffix = f"{first:010d}-{last:010d}.{_EXTENSIONS[file_format]}"
+    writers, buffers, counts = {}, {}, {}
+    for dataset in datasets:
+        path = os.path.join(output_dir, f"{dataset}-{suffix}")
+        if file_format == 'csv':
+            writers[dataset] = _CsvWriter(path + '.partial', SCHEMAS[dataset])
+        else:
+            writers[dataset] = _ArrowWriter(path + '.partial', SCHEMAS[dataset], file_format)
+        buffers[dataset] = []
+        counts[dataset] = 0
+        manifest['files'][dataset] = {'path': path}
+
+    completed = False
+    try:
+        for position in range(first - 1, last):
+            block = chain[position]
+            if not _in_window(block, since, until):
+                continue
+            for dataset, row in _rows_for_block(blockchain, block):
+                if dataset not in buffers:
+                    continue
+                buffer = buffers[dataset]
+                buffer.append(row)
+                if len(buffer) >= chunk_rows:
+                    writers[dataset].write(buffer)
+                    counts[dataset] += len(buffer)
+                    buffer.clear()
+
+        for dataset, buffer in buffers.items():
+            if buffer:
+                writers[dataset].write(buffer)
+                counts[dataset] += len(buffer)
+        completed = True
+    finally:
+        for writer in writers.values():
+            writer.close()
+        if not completed:
+            for info in manifest['files'].values():
+                if os.path.exists(info['path'] + '.partial'):
+                    os.remove(info['path'] + '.partial')
+
+    for dataset, info in manifest['files'].items():
+        os.replace(info['path'] + '.partial', info['path'])
+        info['rows'] = counts[dataset]
+
+    if incremental:
+        state['last_block_index'] = last
+        state['last_export'] = manifest
+        _save_state(output_dir, state)
+    return manifest
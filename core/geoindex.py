@@ -0,0 +1,177 @@
+import bisect
+import math
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+
+
+# _SPREAD[b] has the bits of byte b moved to the even bit positions
+_SPREAD = [sum(((b >> i) & 1) << (2 * i) for i in range(8)) for b in range(256)]
+
+
+def _spread_bits(value):
+    spread, shift = 0, 0
+    while value:
+        spread |= _SPREAD[value & 0xff] << shift
+        value >>= 8
+        shift += 16
+    return spread
+
+
+def geohash_encode(lat, lon, precision):
+    """
+    Standard base32 geohash of a point. Quantises both coordinates to their
+    bit budgets and interleaves them (longitude first) with a lookup table
+    instead of bisecting one bit at a time.
+    """
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    lat_cell = min(int((lat + 90.0) / 180.0 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    lon_cell = min(int((lon + 180.0) / 360.0 * (1 << lon_bits)), (1 << lon_bits) - 1)
+    # The most significant interleaved bit is always a longitude bit
+    if total_bits % 2:
+        value = _spread_bits(lon_cell) | (_spread_bits(lat_cell) << 1)
+    else:
+        value = (_spread_bits(lon_cell) << 1) | _spread_bits(lat_cell)
+    return ''.join(_BASE32[(value >> shift) & 31] for shift in range(total_bits - 5, -1, -5))
+
+
+def _cell_size(precision):
+    """(height, width) in degrees of a geohash cell at the given precision"""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex:
+    """
+    Point index over (lat, lon) keyed by id, backed by a sorted list of geohashes.
+    A bounding box is covered by at most four geohash prefixes whose cells are
+    at least as large as the box, and each prefix is one bisect range scan,
+    so queries cost O(log n + k).
+    """
+    PRECISION = 9  # ~5m cells; plenty to keep neighbouring listings apart
+
+    def __init__(self):
+        self._entries = []  # sorted (geohash, key)
+        self._points = {}   # key -> (lat, lon, geohash)
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def insert(self, key, lat, lon):
+        if key in self._points:
+            self.remove(key)
+        geohash = geohash_encode(lat, lon, self.PRECISION)
+        self._points[key] = (lat, lon, geohash)
+        bisect.insort(self._entries, (geohash, key))
+
+    def insert_many(self, points):
+        """Bulk insert of (key, lat, lon); one sort instead of an insort per point"""
+        added = []
+        for key, lat, lon in points:
+            if key in self._points:
+                self.remove(key)
+            geohash = geohash_encode(lat, lon, self.PRECISION)
+            self._points[key] = (lat, lon, geohash)
+            added.append((geohash, key))
+        self._entries.extend(added)
+        self._entries.sort()
+
+    def remove(self, key):
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        entry = (point[2], key)
+        position = bisect.bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def to_snapshot(self):
+        """Independent copy of the index as plain lists, for a snapshot written in the background"""
+        return {'entries': list(self._entries), 'points': list(self._points.items())}
+
+    @classmethod
+    def from_snapshot(cls, parts):
+        index = cls()
+        index._entries = parts['entries']
+        index._points = dict(parts['points'])
+        return index
+
+    def _covering_prefixes(self, min_lat, min_lon, max_lat, max_lon):
+        height, width = max_lat - min_lat, max_lon - min_lon
+        precision = self.PRECISION
+        while precision > 1:
+            cell_height, cell_width = _cell_size(precision)
+            if cell_height >= height and cell_width >= width:
+                break
+            precision -= 1
+        cell_height, cell_width = _cell_size(precision)
+        if cell_height < height or cell_width < width:
+            return ['']  # Box is larger than a top-level cell: scan everything
+        corners = (
+            (min_lat, min_lon), (min_lat, max_lon),
+            (max_lat, min_lon), (max_lat, max_lon)
+        )
+        return sorted({geohash_encode(lat, lon, precision) for lat, lon in corners})
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Keys of all points inside the box (inclusive); no antimeridian wrap-around"""
+        min_lat, max_lat = max(-90.0, min_lat), min(90.0, max_lat)
+        min_lon, max_lon = max(-180.0, min_lon), min(180.0, max_lon)
+        if min_lat > max_lat or min_lon > max_lon:
+            return []
+
+        keys = []
+        entries = self._entries
+        for prefix in self._covering_prefixes(min_lat, min_lon, max_lat, max_lon):
+            position = bisect.bisect_left(entries, (prefix,))
+            while position < len(entries) and entries[position][0].startswith(prefix):
+                key = entries[position][1]
+                lat, lon, _ = self._points[key]
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    keys.append(key)
+                position += 1
+        return keys
+
+    def within_radius(self, lat, lon, radius_km):
+        """Keys of all points within radius_km of (lat, lon)"""
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        min_lat, max_lat = lat - lat_delta, lat + lat_delta
+        if min_lat <= -90 or max_lat >= 90:
+            # The circle contains a pole, so it spans every longitude
+            lon_delta = 180.0
+        else:
+            # Widest longitude span is at the latitude edge nearest the pole
+            cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+            lon_delta = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+
+        min_lon, max_lon = lon - lon_delta, lon + lon_delta
+        if lon_delta >= 180.0:
+            candidates = self.within_bbox(min_lat, -180.0, max_lat, 180.0)
+        elif min_lon < -180.0:
+            # Split boxes that cross the antimeridian
+            candidates = (self.within_bbox(min_lat, -180.0, max_lat, max_lon)
+                          + self.within_bbox(min_lat, min_lon + 360.0, max_lat, 180.0))
+        elif max_lon > 180.0:
+            candidates = (self.within_bbox(min_lat, min_lon, max_lat, 180.0)
+                          + self.within_bbox(min_lat, -180.0, max_lat, max_lon - 360.0))
+        else:
+            candidates = self.within_bbox(min_lat, min_lon, max_lat, max_lon)
+        return [
+            key for key in candidates
+            if haversine_km(lat, lon, self._points[key][0], self._points[key][1]) <= radius_km
+        ]
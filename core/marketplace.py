@@ -1,25 +1,165 @@
+import gc
+import math
 import time
 import random
 import hashlib
+from contextlib import contextmanager
 from datetime import datetime
 
+from core.metrics import timed
+from core.records import Record
+from core.scheduler import TimerHeap
+from core.geoindex import GeoIndex
+from core.search import SearchIndex
+
+class Company(Record):
+    """A registered trading company and its running trade statistics"""
+    __slots__ = ('company_id', 'name', 'industry', 'country', 'email', 'wallet_address',
+                 'verified', 'credits_owned', 'credits_sold', 'total_trades',
+                 'reputation_score', 'joined_date')
+
+    def __init__(self, company_id, name, industry, country, email, wallet_address,
+                 joined_date, verified=True, credits_owned=0, credits_sold=0,
+                 total_trades=0, reputation_score=100):
+        self.company_id = company_id
+        self.name = name
+        self.industry = industry
+        self.country = country
+        self.email = email
+        self.wallet_address = wallet_address
+        self.verified = verified
+        self.credits_owned = credits_owned
+        self.credits_sold = credits_sold
+        self.total_trades = total_trades
+        self.reputation_score = reputation_score
+        self.joined_date = joined_date
+
+class Listing(Record):
+    """Carbon credits offered for sale"""
+    __slots__ = ('listing_id', 'seller_id', 'seller_name', 'credit_amount', 'available_amount',
+                 'price_per_credit', 'total_value', 'verification_data', 'location',
+                 'description', 'latitude', 'longitude', 'status', 'created_at', 'expires_at',
+                 'views', 'interested_buyers')
+
+    def __init__(self, listing_id, seller_id, seller_name, credit_amount, price_per_credit,
+                 verification_data, location, description, created_at, expires_at,
+                 latitude=None, longitude=None):
+        self.listing_id = listing_id
+        self.seller_id = seller_id
+        self.seller_name = seller_name
+        self.credit_amount = credit_amount
+        self.available_amount = credit_amount
+        self.price_per_credit = price_per_credit
+        self.total_value = credit_amount * price_per_credit
+        self.verification_data = verification_data
+        self.location = location
+        self.description = description
+        self.latitude = latitude  # Verified coordinates, when the listing came from a GeoSentinel scan
+        self.longitude = longitude
+        self.status = 'ACTIVE'
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.views = 0
+        self.interested_buyers = 0
+
+class Order(Record):
+    """A buy order; matched_listing is set once it has been filled"""
+    __slots__ = ('order_id', 'buyer_id', 'buyer_name', 'credit_amount',
+                 'max_price_per_credit', 'status', 'created_at', 'matched_listing')
+
+    def __init__(self, order_id, buyer_id, buyer_name, credit_amount,
+                 max_price_per_credit, created_at):
+        self.order_id = order_id
+        self.buyer_id = buyer_id
+        self.buyer_name = buyer_name
+        self.credit_amount = credit_amount
+        self.max_price_per_credit = max_price_per_credit
+        self.status = 'PENDING'
+        self.created_at = created_at
+        self.matched_listing = None
+
+class Transaction(Record):
+    """
+    A completed trade between a buyer and a listing's seller. anchored is
+    False when blockchain_hash names a block this process's chain does not
+    hold: the chain is in memory only, so trades restored from the event log
+    after a restart lose their on-chain record.
+    """
+    __slots__ = ('transaction_id', 'buyer_id', 'buyer_name', 'seller_id', 'seller_name',
+                 'listing_id', 'credit_amount', 'price_per_credit', 'total_price',
+                 'status', 'timestamp', 'blockchain_hash', 'anchored')
+
+    def __init__(self, transaction_id, buyer_id, buyer_name, seller_id, seller_name,
+                 listing_id, credit_amount, price_per_credit, timestamp):
+        self.transaction_id = transaction_id
+        self.buyer_id = buyer_id
+        self.buyer_name = buyer_name
+        self.seller_id = seller_id
+        self.seller_name = seller_name
+        self.listing_id = listing_id
+        self.credit_amount = credit_amount
+        self.price_per_credit = price_per_credit
+        self.total_price = credit_amount * price_per_credit
+        self.status = 'COMPLETED'
+        self.timestamp = timestamp
+        self.blockchain_hash = None
+        self.anchored = True
+
+def _finite(*values):
+    """
+    Whether every value is a real, finite number. NaN and Infinity pass float()
+    but cannot be written to the event log, so amounts and prices are checked first.
+    """
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v)
+               for v in values)
+
+@contextmanager
+def _gc_paused():
+    """
+    Snapshots and restores build millions of acyclic objects; cyclic GC passes
+    over them are pure overhead, so pause it for the duration
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
 class CarbonMarketplace:
     """
     B2B Carbon Credit Trading Platform for Manufacturing Industry
     Enables verified carbon credits to be listed, bought, and sold on blockchain
     """
     
-    def __init__(self, blockchain):
+    def __init__(self, blockchain, event_store=None):
         self.blockchain = blockchain
-        self.listings = []  # Active marketplace listings
+        # All state below is a projection of the event log; see _record/_apply
+        self.event_store = event_store
+        self.event_sequence = 0
+        self.listings = []  # Every listing ever created, in creation order
+        self.listings_by_id = {}
+        self.active_listings = {}  # listing_id -> Listing, only ACTIVE ones (the live book)
+        self.active_locations = {}  # stripped location -> listing_id, for the duplicate check
+        self.expiry_timers = TimerHeap()  # expires_at -> listing_id
+        self.geo_index = GeoIndex()  # coordinates of active listings
+        # Full-text indexes; listings are indexed only while ACTIVE
+        self.listing_search = SearchIndex({'description': 1.0, 'location': 2.0, 'seller_name': 1.5})
+        self.company_search = SearchIndex({'name': 2.0, 'industry': 1.5, 'country': 1.5})
         self.orders = []    # Buy/Sell orders
         self.transactions = []  # Completed transactions
         self.companies = {}  # Registered companies
         self.listing_id_counter = 1000
         self.order_id_counter = 2000
         self.transaction_id_counter = 3000
-        self.market_price_history = self._generate_simulated_history()
-        self.current_market_price = self.market_price_history[-1]['price']
+        self.market_price_history = []
+        self.current_market_price = None
+        
+        if event_store is not None:
+            self._restore()
+        if not self.market_price_history:
+            self._record('MARKET_SEEDED', {'history': self._generate_simulated_history()})
         
     def _generate_simulated_history(self):
         """Generates realistic market price data for the last 14 days"""
@@ -83,88 +223,93 @@ class CarbonMarketplace:
         """Register a manufacturing company on the platform"""
         company_id = hashlib.sha256(f"{company_name}{time.time()}".encode()).hexdigest()[:12]
         
-        self.companies[company_id] = {
+        self._record('COMPANY_REGISTERED', {
             'company_id': company_id,
             'name': company_name,
             'industry': industry,
             'country': country,
             'email': email or f"contact@{company_name.lower().replace(' ', '')}.com",
             'wallet_address': wallet_address,
-            'verified': True,
-            'credits_owned': 0,
-            'credits_sold': 0,
-            'total_trades': 0,
-            'reputation_score': 100,
             'joined_date': time.time()
-        }
+        })
         
         return company_id
 
     def send_inquiry(self, listing_id, buyer_id):
         """Simulate sending an inquiry email to the seller"""
-        listing = next((l for l in self.listings if l['listing_id'] == listing_id), None)
+        listing = self.listings_by_id.get(listing_id)
         if not listing:
             return {"success": False, "error": "Listing not found"}
             
-        seller = self.companies.get(listing['seller_id'])
+        seller = self.companies.get(listing.seller_id)
         buyer = self.companies.get(buyer_id)
         
         if not seller or not buyer:
             return {"success": False, "error": "Seller or Buyer not found"}
             
-        listing['interested_buyers'] += 1
+        self._record('INQUIRY_SENT', {'listing_id': listing_id, 'buyer_id': buyer_id})
         
         # Simulate email notification
-        print(f"NOTIFICATION: Sending email to {seller['email']}")
+        print(f"NOTIFICATION: Sending email to {seller.email}")
         print(f"Subject: New Inquiry for your Carbon Credit Listing {listing_id}")
-        print(f"Message: Hello {seller['name']}, a buyer ({buyer['name']}) is interested in your listing in {listing['location']}.")
+        print(f"Message: Hello {seller.name}, a buyer ({buyer.name}) is interested in your listing in {listing.location}.")
         
         return {
             "success": True, 
-            "message": f"Inquiry sent to {seller['name']}",
-            "seller_email": seller['email']
+            "message": f"Inquiry sent to {seller.name}",
+            "seller_email": seller.email
         }
     
     def create_listing(self, seller_id, credit_amount, price_per_credit, 
-                       verification_data, location, description=""):
+                       verification_data, location, description="",
+                       latitude=None, longitude=None):
         """Create a new carbon credit listing for sale"""
         
         if seller_id not in self.companies:
             return {"success": False, "error": "Company not registered"}
+        if not _finite(credit_amount, price_per_credit):
+            return {"success": False, "error": "Credit amount and price must be finite numbers"}
+        
+        self.expire_listings()
         
         # Prevent listing the same location twice
-        for existing in self.listings:
-            if existing['location'].strip() == location.strip() and existing['status'] == 'ACTIVE':
-                 return {"success": False, "error": "This location's credits are already listed for sale."}
+        if location.strip() in self.active_locations:
+            return {"success": False, "error": "This location's credits are already listed for sale."}
+        
+        # Fall back to the coordinates carried by the GeoSentinel verification result
+        verification_data = verification_data or {}
+        if latitude is None or longitude is None:
+            latitude = verification_data.get('latitude')
+            longitude = verification_data.get('longitude')
+        if latitude is not None and longitude is not None:
+            latitude, longitude = float(latitude), float(longitude)
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                return {"success": False, "error": "Invalid listing coordinates"}
+        else:
+            latitude = longitude = None
         
         listing_id = f"LST-{self.listing_id_counter}"
-        self.listing_id_counter += 1
         
-        listing = {
+        self._record('LISTING_CREATED', {
             'listing_id': listing_id,
             'seller_id': seller_id,
-            'seller_name': self.companies[seller_id]['name'],
             'credit_amount': credit_amount,
-            'available_amount': credit_amount,
             'price_per_credit': price_per_credit,
-            'total_value': credit_amount * price_per_credit,
             'verification_data': verification_data,
             'location': location,
             'description': description,
-            'status': 'ACTIVE',
             'created_at': time.time(),
             'expires_at': time.time() + (30 * 24 * 60 * 60),  # 30 days
-            'views': 0,
-            'interested_buyers': 0
-        }
-        
-        self.listings.append(listing)
+            'latitude': latitude,
+            'longitude': longitude
+        })
+        listing = self.listings_by_id[listing_id]
         
         # Record on blockchain
         block_data = {
             'type': 'LISTING_CREATED',
             'listing_id': listing_id,
-            'seller': self.companies[seller_id]['name'],
+            'seller': self.companies[seller_id].name,
             'amount': credit_amount,
             'price': price_per_credit,
             'timestamp': time.time()
@@ -181,22 +326,19 @@ class CarbonMarketplace:
         
         if buyer_id not in self.companies:
             return {"success": False, "error": "Company not registered"}
+        if not _finite(credit_amount, max_price_per_credit):
+            return {"success": False, "error": "Credit amount and price must be finite numbers"}
         
         order_id = f"ORD-{self.order_id_counter}"
-        self.order_id_counter += 1
         
-        order = {
+        self._record('ORDER_PLACED', {
             'order_id': order_id,
             'buyer_id': buyer_id,
-            'buyer_name': self.companies[buyer_id]['name'],
             'credit_amount': credit_amount,
             'max_price_per_credit': max_price_per_credit,
-            'status': 'PENDING',
-            'created_at': time.time(),
-            'matched_listing': None
-        }
-        
-        self.orders.append(order)
+            'created_at': time.time()
+        })
+        order = self.orders[-1]
         
         # Try to match with existing listings
         match_result = self._match_order(order)
@@ -207,31 +349,33 @@ class CarbonMarketplace:
             'match': match_result
         }
     
+    @timed('marketplace.match_order')
     def _match_order(self, order):
         """Automatically match buy orders with suitable listings"""
         
+        self.expire_listings()
+        
         # Find listings that match the criteria
         suitable_listings = [
-            listing for listing in self.listings
-            if listing['status'] == 'ACTIVE'
-            and listing['available_amount'] >= order['credit_amount']
-            and listing['price_per_credit'] <= order['max_price_per_credit']
+            listing for listing in self.active_listings.values()
+            if listing.available_amount >= order.credit_amount
+            and listing.price_per_credit <= order.max_price_per_credit
         ]
         
         if not suitable_listings:
             return {'matched': False, 'reason': 'No suitable listings found'}
         
         # Sort by best price
-        suitable_listings.sort(key=lambda x: x['price_per_credit'])
+        suitable_listings.sort(key=lambda x: x.price_per_credit)
         best_listing = suitable_listings[0]
         
         # Execute transaction
         transaction = self.execute_transaction(
-            order['buyer_id'],
-            best_listing['seller_id'],
-            best_listing['listing_id'],
-            order['credit_amount'],
-            best_listing['price_per_credit']
+            order.buyer_id,
+            best_listing.seller_id,
+            best_listing.listing_id,
+            order.credit_amount,
+            best_listing.price_per_credit
         )
         
         return {
@@ -245,96 +389,130 @@ class CarbonMarketplace:
         """Execute a carbon credit transaction"""
         
         transaction_id = f"TXN-{self.transaction_id_counter}"
-        self.transaction_id_counter += 1
         
+        buyer = self.companies[buyer_id]
+        seller = self.companies[seller_id]
         total_price = credit_amount * price_per_credit
         
-        transaction = {
-            'transaction_id': transaction_id,
-            'buyer_id': buyer_id,
-            'buyer_name': self.companies[buyer_id]['name'],
-            'seller_id': seller_id,
-            'seller_name': self.companies[seller_id]['name'],
-            'listing_id': listing_id,
-            'credit_amount': credit_amount,
-            'price_per_credit': price_per_credit,
-            'total_price': total_price,
-            'status': 'COMPLETED',
-            'timestamp': time.time(),
-            'blockchain_hash': None
-        }
-        
-        # Update listing
-        for listing in self.listings:
-            if listing['listing_id'] == listing_id:
-                listing['available_amount'] -= credit_amount
-                if listing['available_amount'] == 0:
-                    listing['status'] = 'SOLD_OUT'
-                break
-        
-        # Update company stats and reputation
-        self.companies[buyer_id]['credits_owned'] += credit_amount
-        self.companies[buyer_id]['total_trades'] += 1
-        self.companies[buyer_id]['reputation_score'] = min(100, self.companies[buyer_id]['reputation_score'] + 1)
-        
-        self.companies[seller_id]['credits_sold'] += credit_amount
-        self.companies[seller_id]['total_trades'] += 1
-        self.companies[seller_id]['reputation_score'] = min(100, self.companies[seller_id]['reputation_score'] + 2)
-        
         # Record on blockchain
         last_block = self.blockchain.get_last_block()
-        proof = last_block['proof'] + 1
+        proof = last_block.proof + 1
         previous_hash = self.blockchain.hash(last_block)
         
         new_block = self.blockchain.create_block(proof, previous_hash)
-        new_block['data'].append({
+        new_block.data.append({
             'type': 'CARBON_CREDIT_TRADE',
             'transaction_id': transaction_id,
-            'buyer': self.companies[buyer_id]['name'],
-            'seller': self.companies[seller_id]['name'],
+            'buyer': buyer.name,
+            'seller': seller.name,
             'amount': credit_amount,
             'price': price_per_credit,
             'total_value': total_price,
             'timestamp': time.time()
         })
         
-        transaction['blockchain_hash'] = self.blockchain.hash(new_block)
-        
-        self.transactions.append(transaction)
+        # Listing, company stats and reputation are updated by applying the event
+        self._record('TRADE_EXECUTED', {
+            'transaction_id': transaction_id,
+            'buyer_id': buyer_id,
+            'seller_id': seller_id,
+            'listing_id': listing_id,
+            'credit_amount': credit_amount,
+            'price_per_credit': price_per_credit,
+            'timestamp': time.time(),
+            'blockchain_hash': self.blockchain.hash(new_block)
+        })
         
-        return transaction
+        return self.transactions[-1]
     
     def get_active_listings(self, filters=None):
-        """Get all active marketplace listings with optional filters"""
-        active = [l for l in self.listings if l['status'] == 'ACTIVE']
+        """
+        Get all active marketplace listings with optional filters:
+        max_price, min_amount, bbox (min_lat, min_lon, max_lat, max_lon)
+        and near (lat, lon, radius_km). Geo filters only match listings
+        that carry verified coordinates.
+        """
+        self.expire_listings()
+        filters = filters or {}
+        
+        if 'bbox' in filters or 'near' in filters:
+            if 'bbox' in filters:
+                listing_ids = self.geo_index.within_bbox(*filters['bbox'])
+                if 'near' in filters:
+                    nearby = set(self.geo_index.within_radius(*filters['near']))
+                    listing_ids = [i for i in listing_ids if i in nearby]
+            else:
+                listing_ids = self.geo_index.within_radius(*filters['near'])
+            active = sorted((self.active_listings[i] for i in listing_ids),
+                            key=lambda x: x.created_at, reverse=True)
+        else:
+            # The live book is in creation order, so newest first is just the reverse
+            active = list(reversed(self.active_listings.values()))
         
         if filters:
             if 'max_price' in filters:
-                active = [l for l in active if l['price_per_credit'] <= filters['max_price']]
+                active = [l for l in active if l.price_per_credit <= filters['max_price']]
             if 'min_amount' in filters:
-                active = [l for l in active if l['available_amount'] >= filters['min_amount']]
+                active = [l for l in active if l.available_amount >= filters['min_amount']]
         
-        return sorted(active, key=lambda x: x['created_at'], reverse=True)
+        return active
+    
+    def search(self, query, kind='all', page=1, per_page=20):
+        """
+        Ranked full-text search over active listings (description, location,
+        seller) and companies (name, industry, country). All query words must match.
+        """
+        self.expire_listings()
+        page = max(1, int(page))
+        per_page = max(1, min(100, int(per_page)))
+        limit = page * per_page
+        
+        hits = []
+        total = 0
+        if kind in ('all', 'listings'):
+            count, found = self.listing_search.search(query, limit)
+            total += count
+            hits.extend((score, 'listing', doc_id) for score, doc_id in found)
+        if kind in ('all', 'companies'):
+            count, found = self.company_search.search(query, limit)
+            total += count
+            hits.extend((score, 'company', doc_id) for score, doc_id in found)
+        
+        hits.sort(key=lambda hit: hit[0], reverse=True)
+        results = []
+        for score, doc_type, doc_id in hits[(page - 1) * per_page:limit]:
+            item = self.listings_by_id[doc_id] if doc_type == 'listing' else self.companies[doc_id]
+            results.append({'type': doc_type, 'score': round(score, 4), 'item': item})
+        
+        return {
+            'query': query,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'results': results
+        }
     
     def get_transaction_history(self, company_id=None):
         """Get transaction history, optionally filtered by company"""
         if company_id:
             return [
                 t for t in self.transactions
-                if t['buyer_id'] == company_id or t['seller_id'] == company_id
+                if t.buyer_id == company_id or t.seller_id == company_id
             ]
         return self.transactions
     
     def get_market_stats(self):
         """Get overall marketplace statistics"""
-        total_volume = sum(t['total_price'] for t in self.transactions)
-        total_credits_traded = sum(t['credit_amount'] for t in self.transactions)
+        total_volume = sum(t.total_price for t in self.transactions)
+        total_credits_traded = sum(t.credit_amount for t in self.transactions)
         
         avg_price = total_volume / total_credits_traded if total_credits_traded > 0 else 0
         
+        self.expire_listings()
+        
         return {
             'total_companies': len(self.companies),
-            'active_listings': len([l for l in self.listings if l['status'] == 'ACTIVE']),
+            'active_listings': len(self.active_listings),
             'total_transactions': len(self.transactions),
             'total_volume_usd': round(total_volume, 2),
             'total_credits_traded': round(total_credits_traded, 2),
@@ -347,13 +525,327 @@ class CarbonMarketplace:
         if company_id not in self.companies:
             return None
         
-        company = self.companies[company_id].copy()
+        self.expire_listings()
+        company = self.companies[company_id].to_dict()
         
         # Add transaction history
         company['transactions'] = self.get_transaction_history(company_id)
         company['active_listings'] = [
-            l for l in self.listings 
-            if l['seller_id'] == company_id and l['status'] == 'ACTIVE'
+            l for l in self.active_listings.values()
+            if l.seller_id == company_id
         ]
         
         return company
+    
+    def _deactivate_listing(self, listing, status):
+        """Moves a listing out of the live book"""
+        listing.status = status
+        self.active_listings.pop(listing.listing_id, None)
+        self.geo_index.remove(listing.listing_id)
+        self.listing_search.remove(listing.listing_id)
+        location = listing.location.strip()
+        if self.active_locations.get(location) == listing.listing_id:
+            del self.active_locations[location]
+    
+    def expire_listings(self, now=None):
+        """
+        Expires every ACTIVE listing whose expires_at has passed and records
+        the batch in a single block. Cheap when nothing is due (one heap peek),
+        so it is called at the start of every operation on the live book.
+        """
+        now = time.time() if now is None else now
+        next_deadline = self.expiry_timers.next_deadline()
+        if next_deadline is None or next_deadline > now:
+            return []
+        
+        expired = []
+        for listing_id in self.expiry_timers.pop_due(now):
+            listing = self.listings_by_id.get(listing_id)
+            # Sold-out listings leave stale timers behind; skip them
+            if listing and listing.status == 'ACTIVE':
+                expired.append(listing)
+        
+        if expired:
+            last_block = self.blockchain.get_last_block()
+            new_block = self.blockchain.create_block(last_block.proof + 1, self.blockchain.hash(last_block))
+            for listing in expired:
+                new_block.data.append({
+                    'type': 'LISTING_EXPIRED',
+                    'listing_id': listing.listing_id,
+                    'seller': listing.seller_name,
+                    'unsold_amount': listing.available_amount,
+                    'expired_at': listing.expires_at,
+                    'timestamp': now
+                })
+            self._record('LISTINGS_EXPIRED', {
+                'listing_ids': [listing.listing_id for listing in expired],
+                'timestamp': now
+            })
+        
+        return expired
+    
+    # ============ BULK INGEST ============
+    # Capacity-testing path (see core/workload.py): whole batches are validated
+    # once and recorded as one event per BULK_EVENT_SIZE records, skipping the
+    # per-record expiry sweep and order matching.
+    
+    BULK_EVENT_SIZE = 10_000
+    
+    def _record_batches(self, event_type, key, records):
+        for start in range(0, len(records), self.BULK_EVENT_SIZE):
+            self._record(event_type, {key: records[start:start + self.BULK_EVENT_SIZE]})
+    
+    def bulk_register_companies(self, companies):
+        """
+        Registers company dicts (name, industry, country, wallet_address and
+        optionally email) and returns their ids
+        """
+        now = time.time()
+        records = []
+        for number, company in enumerate(companies):
+            name = company['name']
+            records.append({
+                'company_id': hashlib.sha256(f"{name}{now}{number}".encode()).hexdigest()[:12],
+                'name': name,
+                'industry': company['industry'],
+                'country': company['country'],
+                'email': company.get('email') or f"contact@{name.lower().replace(' ', '')}.com",
+                'wallet_address': company['wallet_address'],
+                'joined_date': now
+            })
+        self._record_batches('COMPANIES_REGISTERED', 'companies', records)
+        return [record['company_id'] for record in records]
+    
+    def bulk_create_listings(self, listings):
+        """
+        Creates listing dicts (the create_listing arguments) and returns their ids.
+        A location already listed, or repeated within the batch, fails the whole batch.
+        """
+        self.expire_listings()
+        now = time.time()
+        records = []
+        locations = set()
+        for listing in listings:
+            if listing['seller_id'] not in self.companies:
+                raise ValueError(f"Company not registered: {listing['seller_id']}")
+            location = listing['location'].strip()
+            if location in self.active_locations or location in locations:
+                raise ValueError(f"Location already listed for sale: {location}")
+            locations.add(location)
+            if not _finite(listing['credit_amount'], listing['price_per_credit']):
+                raise ValueError(f"Credit amount and price must be finite numbers: {listing['location']}")
+            latitude, longitude = listing.get('latitude'), listing.get('longitude')
+            if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError(f"Invalid listing coordinates: {latitude}, {longitude}")
+            records.append({
+                'listing_id': f"LST-{self.listing_id_counter + len(records)}",
+                'seller_id': listing['seller_id'],
+                'credit_amount': listing['credit_amount'],
+                'price_per_credit': listing['price_per_credit'],
+                'verification_data': listing.get('verification_data') or {},
+                'location': listing['location'],
+                'description': listing.get('description', ''),
+                'created_at': now,
+                'expires_at': now + (30 * 24 * 60 * 60),  # 30 days
+                'latitude': latitude,
+                'longitude': longitude
+            })
+        self._record_batches('LISTINGS_CREATED', 'listings', records)
+        return [record['listing_id'] for record in records]
+    
+    def bulk_place_orders(self, orders):
+        """
+        Places buy order dicts (buyer_id, credit_amount, max_price_per_credit)
+        and returns their ids. Orders are left PENDING: matching each one would
+        scan the whole book.
+        """
+        now = time.time()
+        records = []
+        for order in orders:
+            if order['buyer_id'] not in self.companies:
+                raise ValueError(f"Company not registered: {order['buyer_id']}")
+            if not _finite(order['credit_amount'], order['max_price_per_credit']):
+                raise ValueError("Credit amount and price must be finite numbers")
+            records.append({
+                'order_id': f"ORD-{self.order_id_counter + len(records)}",
+                'buyer_id': order['buyer_id'],
+                'credit_amount': order['credit_amount'],
+                'max_price_per_credit': order['max_price_per_credit'],
+                'created_at': now
+            })
+        self._record_batches('ORDERS_PLACED', 'orders', records)
+        return [record['order_id'] for record in records]
+    
+    # ============ EVENT SOURCING ============
+    # Commands above validate input, do external side effects (mining blocks)
+    # and then _record an event. Only the _apply_* handlers mutate marketplace
+    # state, so replaying the log (or loading a snapshot and replaying its tail)
+    # always rebuilds exactly the same state.
+    
+    def _record(self, event_type, data):
+        event = {'seq': self.event_sequence + 1, 'type': event_type, 'data': data}
+        if self.event_store is not None:
+            self.event_store.append(event)
+        self._apply(event)
+        if self.event_store is not None and self.event_store.should_snapshot(self.event_sequence):
+            # Under the caller's lock this costs a fork (or, without fork, the
+            # copy); capturing, pickling and the fsync run in the background
+            with _gc_paused():
+                self.event_store.write_snapshot_in_background(self.event_sequence, self._snapshot_state)
+    
+    def _apply(self, event):
+        getattr(self, '_apply_' + event['type'].lower())(event['data'])
+        self.event_sequence = event['seq']
+    
+    def _restore(self):
+        """Loads the newest snapshot, then replays the events recorded after it"""
+        with _gc_paused():
+            state, events = self.event_store.load()
+            if state is not None:
+                self._load_snapshot_state(state)
+            for event in events:
+                self._apply(event)
+        # Trades mined into a previous process's chain have no block here
+        chain_hashes = {self.blockchain.hash(block) for block in self.blockchain.chain}
+        for transaction in self.transactions:
+            transaction.anchored = transaction.blockchain_hash in chain_hashes
+    
+    def _apply_market_seeded(self, data):
+        self.market_price_history = data['history']
+        self.current_market_price = self.market_price_history[-1]['price']
+    
+    def _apply_company_registered(self, data):
+        self._index_company(Company(**data))
+    
+    def _apply_listing_created(self, data):
+        listing = Listing(seller_name=self.companies[data['seller_id']].name, **data)
+        self.listing_id_counter += 1
+        self.listings.append(listing)
+        self._index_listing(listing)
+    
+    def _apply_companies_registered(self, data):
+        for company in data['companies']:
+            self._apply_company_registered(company)
+    
+    def _apply_listings_created(self, data):
+        points = []
+        for fields in data['listings']:
+            listing = Listing(seller_name=self.companies[fields['seller_id']].name, **fields)
+            self.listing_id_counter += 1
+            self.listings.append(listing)
+            self._index_listing(listing, geo=False)
+            if listing.latitude is not None:
+                points.append((listing.listing_id, listing.latitude, listing.longitude))
+        self.geo_index.insert_many(points)
+    
+    def _apply_orders_placed(self, data):
+        for order in data['orders']:
+            self._apply_order_placed(order)
+    
+    def _apply_inquiry_sent(self, data):
+        self.listings_by_id[data['listing_id']].interested_buyers += 1
+    
+    def _apply_order_placed(self, data):
+        self.order_id_counter += 1
+        self.orders.append(Order(buyer_name=self.companies[data['buyer_id']].name, **data))
+    
+    def _apply_trade_executed(self, data):
+        buyer = self.companies[data['buyer_id']]
+        seller = self.companies[data['seller_id']]
+        credit_amount = data['credit_amount']
+        
+        transaction = Transaction(
+            transaction_id=data['transaction_id'],
+            buyer_id=buyer.company_id,
+            buyer_name=buyer.name,
+            seller_id=seller.company_id,
+            seller_name=seller.name,
+            listing_id=data['listing_id'],
+            credit_amount=credit_amount,
+            price_per_credit=data['price_per_credit'],
+            timestamp=data['timestamp']
+        )
+        transaction.blockchain_hash = data['blockchain_hash']
+        self.transaction_id_counter += 1
+        
+        # Update listing
+        listing = self.listings_by_id.get(data['listing_id'])
+        if listing:
+            listing.available_amount -= credit_amount
+            if listing.available_amount == 0:
+                self._deactivate_listing(listing, 'SOLD_OUT')
+        
+        # Update company stats and reputation
+        buyer.credits_owned += credit_amount
+        buyer.total_trades += 1
+        buyer.reputation_score = min(100, buyer.reputation_score + 1)
+        
+        seller.credits_sold += credit_amount
+        seller.total_trades += 1
+        seller.reputation_score = min(100, seller.reputation_score + 2)
+        
+        self.transactions.append(transaction)
+    
+    def _apply_listings_expired(self, data):
+        for listing_id in data['listing_ids']:
+            self._deactivate_listing(self.listings_by_id[listing_id], 'EXPIRED')
+    
+    def _index_company(self, company):
+        self.companies[company.company_id] = company
+        self.company_search.add(company.company_id, {
+            'name': company.name, 'industry': company.industry, 'country': company.country
+        })
+    
+    def _index_listing(self, listing, geo=True, text=True):
+        """Adds a listing to the id index and, while ACTIVE, to the live book and its indexes"""
+        listing_id = listing.listing_id
+        self.listings_by_id[listing_id] = listing
+        if listing.status != 'ACTIVE':
+            return
+        self.active_listings[listing_id] = listing
+        self.active_locations[listing.location.strip()] = listing_id
+        self.expiry_timers.schedule(listing.expires_at, listing_id)
+        if geo and listing.latitude is not None:
+            self.geo_index.insert(listing_id, listing.latitude, listing.longitude)
+        if text:
+            self.listing_search.add(listing_id, {
+                'description': listing.description, 'location': listing.location,
+                'seller_name': listing.seller_name
+            })
+    
+    def _snapshot_state(self):
+        """
+        Compact projection of the state, copied so it can be written while
+        the marketplace keeps changing. Records are stored as tuples; the geo
+        and full-text indexes are stored whole because rebuilding them is what
+        dominates a cold replay. The cheap id and active-book indexes are rebuilt.
+        """
+        return {
+            'event_sequence': self.event_sequence,
+            'counters': (self.listing_id_counter, self.order_id_counter, self.transaction_id_counter),
+            'market_price_history': list(self.market_price_history),
+            'companies': Company.as_tuples(self.companies.values()),
+            'listings': Listing.as_tuples(self.listings),
+            'orders': Order.as_tuples(self.orders),
+            'transactions': Transaction.as_tuples(self.transactions),
+            'geo_index': self.geo_index.to_snapshot(),
+            'listing_search': self.listing_search.to_snapshot(),
+            'company_search': self.company_search.to_snapshot()
+        }
+    
+    def _load_snapshot_state(self, state):
+        self.event_sequence = state['event_sequence']
+        self.listing_id_counter, self.order_id_counter, self.transaction_id_counter = state['counters']
+        self._apply_market_seeded({'history': state['market_price_history']})
+        self.geo_index = GeoIndex.from_snapshot(state['geo_index'])
+        self.listing_search = SearchIndex.from_snapshot(state['listing_search'])
+        self.company_search = SearchIndex.from_snapshot(state['company_search'])
+        for values in state['companies']:
+            company = Company.from_tuple(values)
+            self.companies[company.company_id] = company
+        for values in state['listings']:
+            listing = Listing.from_tuple(values)
+            self.listings.append(listing)
+            self._index_listing(listing, geo=False, text=False)  # both come from the snapshot
+        self.orders = [Order.from_tuple(values) for values in state['orders']]
+        self.transactions = [Transaction.from_tuple(values) for values in state['transactions']]
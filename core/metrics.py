@@ -0,0 +1,223 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram for latencies.
+    Values are recorded in whole microseconds; each power of two is split into
+    32 linear sub-buckets, which keeps the relative error around 3% while
+    recording stays a couple of integer operations.
+    """
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_EXPONENT = 40  # ~12 days in microseconds, more than enough for a request
+
+    def __init__(self):
+        self.counts = [0] * (self.SUB_BUCKETS * (self.MAX_EXPONENT + 2))
+        self.count = 0
+        self.total = 0.0
+        self.max_value = 0
+
+    def _index(self, value):
+        if value < 2 * self.SUB_BUCKETS:
+            return value
+        exponent = value.bit_length() - (self.SUB_BUCKET_BITS + 1)
+        if exponent > self.MAX_EXPONENT:
+            return len(self.counts) - 1
+        return exponent * self.SUB_BUCKETS + (value >> exponent)
+
+    def _upper_bound(self, index):
+        """Highest value (in microseconds) that falls into the given bucket"""
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        exponent = index // self.SUB_BUCKETS - 1
+        mantissa = index - exponent * self.SUB_BUCKETS
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, seconds):
+        value = int(seconds * 1_000_000)
+        if value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += seconds
+        if value > self.max_value:
+            self.max_value = value
+
+    def quantile(self, q):
+        """Returns the approximate q-quantile in seconds"""
+        if self.count == 0:
+            return 0.0
+        target = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            if seen >= target:
+                return min(self._upper_bound(index), self.max_value) / 1_000_000
+        return self.max_value / 1_000_000
+
+
+class MetricsRegistry:
+    """
+    Collects request and span latencies plus gauge callbacks,
+    and renders them in the Prometheus text exposition format.
+    """
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, prefix='geoverify'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._requests = {}  # (method, endpoint, status) -> LatencyHistogram
+        self._spans = {}     # span name -> LatencyHistogram
+        self._gauges = []    # (name, help, callback)
+        # Forwarding mode (see forward_to): observations are batched to another registry
+        self._send = None
+        self._pending = []
+        self._max_batch = 0
+        self._max_delay = 0.0
+        self._last_flush = 0.0
+
+    def forward_to(self, send, max_batch=256, max_delay=1.0):
+        """
+        Stops keeping histograms here and ships observations to send(batch)
+        instead, at most max_delay seconds late. Used by request workers so the
+        writer process holds one set of histograms for the whole deployment.
+        """
+        self._send = send
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+        self._last_flush = time.monotonic()
+
+    def _forward(self, observation):
+        with self._lock:
+            self._pending.append(observation)
+            due = (len(self._pending) >= self._max_batch
+                   or time.monotonic() - self._last_flush >= self._max_delay)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Sends buffered observations; dropped if the receiver is unreachable"""
+        if self._send is None:
+            return
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if batch:
+            try:
+                self._send(batch)
+            except Exception:
+                pass  # metrics must never fail a request
+
+    def record_batch(self, observations):
+        """Applies observations forwarded by another registry"""
+        for observation in observations:
+            if observation[0] == 'request':
+                self._record_request(*observation[1:])
+            else:
+                self._record_span(*observation[1:])
+
+    def observe_request(self, method, endpoint, status, seconds):
+        if self._send is not None:
+            self._forward(('request', method, endpoint, str(status), seconds))
+        else:
+            self._record_request(method, endpoint, str(status), seconds)
+
+    def observe_span(self, name, seconds):
+        if self._send is not None:
+            self._forward(('span', name, seconds))
+        else:
+            self._record_span(name, seconds)
+
+    def _record_request(self, method, endpoint, status, seconds):
+        key = (method, endpoint, status)
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def _record_span(self, name, seconds):
+        with self._lock:
+            histogram = self._spans.get(name)
+            if histogram is None:
+                histogram = self._spans[name] = LatencyHistogram()
+            histogram.record(seconds)
+
+    @contextmanager
+    def span(self, name):
+        """Times the enclosed block as an internal span"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_span(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Decorator form of span() for functions and methods"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe_span(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def register_gauge(self, name, help_text, callback):
+        """Registers a gauge whose value is read from callback() at scrape time"""
+        self._gauges.append((name, help_text, callback))
+
+    def _render_summary(self, lines, name, help_text, histograms, label_names):
+        if not histograms:
+            return  # a registry that only forwards must not repeat another's HELP lines
+        metric = f"{self.prefix}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} summary")
+        for key, histogram in sorted(histograms.items()):
+            if not isinstance(key, tuple):
+                key = (key,)
+            labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(label_names, key))
+            for q in self.QUANTILES:
+                lines.append(f'{metric}{{{labels},quantile="{q}"}} {histogram.quantile(q):.6f}')
+            lines.append(f"{metric}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            self._render_summary(lines, 'http_request_duration_seconds',
+                                 'HTTP request latency by endpoint',
+                                 self._requests, ('method', 'endpoint', 'status'))
+            self._render_summary(lines, 'span_duration_seconds',
+                                 'Latency of internal operations',
+                                 self._spans, ('span',))
+
+        for name, help_text, callback in self._gauges:
+            metric = f"{self.prefix}_{name}"
+            try:
+                value = float(callback())
+            except Exception:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry shared by the core components and the Flask app
+registry = MetricsRegistry()
+span = registry.span
+timed = registry.timed
@@ -0,0 +1,168 @@
+import cProfile
+import itertools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+
+# Core modules whose share of a profile is summarised separately
+COMPONENTS = {
+    'verifier': 'GeoSentinel',
+    'marketplace': 'CarbonMarketplace',
+    'blockchain': 'Blockchain'
+}
+
+
+def _frame_label(code):
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _component_of(label):
+    return COMPONENTS.get(label.split(':', 1)[0])
+
+
+class StackSampler:
+    """
+    Samples the call stack of a single thread from a background thread.
+    Stacks are stored collapsed (root;...;leaf -> count), ready for flamegraph.pl or speedscope.
+    """
+    def __init__(self, thread_id, interval=0.002, max_depth=64):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='geoverify-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            key = ';'.join(reversed(labels))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+
+class DeterministicProfiler:
+    """Wraps cProfile; caller -> callee edges are exported as two-level collapsed stacks"""
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.stacks = {}
+        self.samples = 0
+        self.report = ''
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        stats = pstats.Stats(self.profile)
+        for func, (_, _, tottime, _, callers) in stats.stats.items():
+            callee = f"{os.path.splitext(os.path.basename(func[0]))[0]}:{func[2]}"
+            if not callers:
+                self.stacks[callee] = self.stacks.get(callee, 0) + int(tottime * 1_000_000)
+                continue
+            for caller, (_, _, caller_tottime, _) in callers.items():
+                key = f"{os.path.splitext(os.path.basename(caller[0]))[0]}:{caller[2]};{callee}"
+                self.stacks[key] = self.stacks.get(key, 0) + int(caller_tottime * 1_000_000)
+        self.samples = sum(self.stacks.values())
+
+        lines = []
+        for func, (_, ncalls, tottime, cumtime, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:40]:
+            lines.append(f"{ncalls:>8} {tottime:10.6f} {cumtime:10.6f}  {func[0]}:{func[1]}({func[2]})")
+        self.report = '   ncalls    tottime    cumtime  function\n' + '\n'.join(lines)
+
+
+class ProfileStore:
+    """
+    Opt-in per-request profiling with a bounded ring of recent profiles.
+    When disabled, the only cost per request is the `enabled` check.
+    """
+    MODES = ('sample', 'cprofile')
+
+    def __init__(self, enabled=False, capacity=20, interval=0.002):
+        self.enabled = enabled
+        self.interval = interval
+        self._profiles = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def start(self, mode='sample'):
+        """Starts profiling the calling thread; returns a handle for finish()"""
+        if mode == 'cprofile':
+            profiler = DeterministicProfiler()
+        else:
+            mode = 'sample'
+            profiler = StackSampler(threading.get_ident(), self.interval)
+        profiler.start()
+        return {'mode': mode, 'profiler': profiler,
+                'started_at': time.time(), 'start': time.perf_counter()}
+
+    def finish(self, handle, method, path, status):
+        duration = time.perf_counter() - handle['start']
+        profiler = handle['profiler']
+        profiler.stop()
+
+        components = {}
+        for stack, weight in profiler.stacks.items():
+            seen = set()
+            for label in stack.split(';'):
+                component = _component_of(label)
+                if component and component not in seen:
+                    seen.add(component)
+                    components[component] = components.get(component, 0) + weight
+
+        record = {
+            'profile_id': next(self._ids),
+            'mode': handle['mode'],
+            'method': method,
+            'path': path,
+            'status': status,
+            'started_at': handle['started_at'],
+            'duration_ms': round(duration * 1000, 3),
+            'samples': profiler.samples,
+            'components': components,
+            'stacks': profiler.stacks,
+            'report': getattr(profiler, 'report', '')
+        }
+        with self._lock:
+            self._profiles.append(record)
+        return record
+
+    def list_profiles(self):
+        """Summaries of the stored profiles, newest first"""
+        with self._lock:
+            profiles = list(self._profiles)
+        return [
+            {key: value for key, value in p.items() if key not in ('stacks', 'report')}
+            for p in reversed(profiles)
+        ]
+
+    def get_profile(self, profile_id):
+        with self._lock:
+            return next((p for p in self._profiles if p['profile_id'] == profile_id), None)
+
+    @staticmethod
+    def collapsed(profile):
+        """Renders a profile in collapsed-stack format (one `stack count` per line)"""
+        return '\n'.join(
+            f"{stack} {count}"
+            for stack, count in sorted(profile['stacks'].items(), key=lambda item: -item[1])
+        ) + '\n'
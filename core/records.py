@@ -0,0 +1,34 @@
+import operator
+
+
+class Record:
+    """
+    Base for the compact record types used by the core components.
+    Subclasses declare their fields in __slots__ (in JSON output order), so a
+    record costs one small fixed-size object instead of a per-record dict.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """JSON view of the record, keyed by field name"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def as_tuple(self):
+        """Field values in slot order; the compact form used by snapshots"""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    @classmethod
+    def as_tuples(cls, records):
+        """as_tuple over many records of this class, with one C-level attrgetter"""
+        return list(map(operator.attrgetter(*cls.__slots__), records))
+
+    @classmethod
+    def from_tuple(cls, values):
+        record = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            setattr(record, name, value)
+        return record
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:2])
+        return f"{type(self).__name__}({fields}, ...)"
@@ -0,0 +1,30 @@
+import heapq
+import itertools
+
+
+class TimerHeap:
+    """
+    Min-heap of (deadline, key) timers.
+    Scheduling and popping are O(log n); cancelled or superseded timers are
+    simply skipped by the caller when they come due (lazy deletion).
+    """
+    def __init__(self):
+        self._heap = []
+        self._sequence = itertools.count()  # tie-breaker so keys are never compared
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, deadline, key):
+        heapq.heappush(self._heap, (deadline, next(self._sequence), key))
+
+    def next_deadline(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Removes and returns the keys of all timers with deadline <= now, earliest first"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due.append(heapq.heappop(heap)[2])
+        return due
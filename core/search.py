@@ -0,0 +1,203 @@
+import bisect
+import heapq
+import math
+import operator
+import re
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with'
+})
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """
+    Incrementally maintained inverted index with BM25-style ranking.
+
+    Each posting stores a precomputed, length-normalised term weight, so a
+    query only multiplies by idf. Queries are conjunctive. Every queried term
+    gets a list of its postings ranked by weight; once built it is kept up to
+    date on writes (removals bisect it, additions are merged at the next read)
+    instead of being re-sorted. Multi-term queries walk the ranked lists in
+    step and stop as soon as no unseen document can beat the current top k
+    (Fagin's threshold algorithm), so they usually read a short prefix of the
+    lists. When the terms rank documents too differently for that, the walk
+    gives up after as many entries as there are matches and scores those.
+    """
+    K1 = 1.2
+    B = 0.75
+    AVG_FIELD_TOKENS = 12.0  # fixed length prior, so weights never need recomputing
+
+    def __init__(self, field_weights):
+        self.field_weights = field_weights
+        self._postings = {}     # term -> {doc_id: weight}
+        self._doc_terms = {}    # doc_id -> terms, for removal
+        self._ranked = {}       # term -> [(-weight, doc_id)] ascending, built on first query
+        self._pending = {}      # term -> {(-weight, doc_id)} added since its list was last merged
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_terms
+
+    SNAPSHOT_PIECE = 1000  # postings per snapshot item, so no item takes long to pickle
+
+    def to_snapshot(self):
+        """
+        Independent copy of the index as plain lists, for a snapshot written
+        in the background: postings become (term, doc_ids, weights) items of
+        at most SNAPSHOT_PIECE entries. The ranked lists are rebuilt on demand.
+        """
+        pieces = []
+        piece = self.SNAPSHOT_PIECE
+        for term, postings in self._postings.items():
+            doc_ids, weights = list(postings), list(postings.values())
+            if len(doc_ids) <= piece:
+                pieces.append((term, doc_ids, weights))
+                continue
+            for start in range(0, len(doc_ids), piece):
+                pieces.append((term, doc_ids[start:start + piece], weights[start:start + piece]))
+        return {
+            'field_weights': dict(self.field_weights),
+            'postings': pieces,
+            'doc_terms': list(self._doc_terms.items())
+        }
+
+    @classmethod
+    def from_snapshot(cls, parts):
+        index = cls(parts['field_weights'])
+        postings = index._postings
+        for term, doc_ids, weights in parts['postings']:
+            if term in postings:
+                postings[term].update(zip(doc_ids, weights))
+            else:
+                postings[term] = dict(zip(doc_ids, weights))
+        index._doc_terms = dict(parts['doc_terms'])
+        return index
+
+    def add(self, doc_id, fields):
+        """Indexes a document given as {field_name: text}"""
+        if doc_id in self._doc_terms:
+            self.remove(doc_id)
+
+        frequencies = {}
+        length = 0
+        for field, weight in self.field_weights.items():
+            tokens = tokenize(fields.get(field))
+            length += len(tokens)
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + weight
+
+        norm = self.K1 * (1 - self.B + self.B * length / self.AVG_FIELD_TOKENS)
+        for term, tf in frequencies.items():
+            weight = tf * (self.K1 + 1) / (tf + norm)
+            self._postings.setdefault(term, {})[doc_id] = weight
+            if term in self._ranked:
+                self._pending.setdefault(term, set()).add((-weight, doc_id))
+        self._doc_terms[doc_id] = tuple(frequencies)
+
+    def remove(self, doc_id):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings[term]
+            entry = (-postings.pop(doc_id), doc_id)
+            if not postings:
+                del self._postings[term]
+                self._ranked.pop(term, None)
+                self._pending.pop(term, None)
+            elif term in self._ranked:
+                pending = self._pending.get(term)
+                if pending and entry in pending:
+                    pending.discard(entry)
+                    continue
+                ranked = self._ranked[term]
+                position = bisect.bisect_left(ranked, entry)
+                if position < len(ranked) and ranked[position] == entry:
+                    del ranked[position]
+
+    def _ranked_list(self, term):
+        """The term's postings as [(-weight, doc_id)], best first"""
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ranked = self._ranked[term] = sorted((-w, d) for d, w in self._postings[term].items())
+            return ranked
+        pending = self._pending.pop(term, None)
+        if pending:
+            if len(pending) * 8 < len(ranked):
+                for entry in pending:
+                    bisect.insort(ranked, entry)
+            else:
+                # One sort of a sorted run plus a tail is a near-linear merge
+                ranked.extend(pending)
+                ranked.sort()
+        return ranked
+
+    @staticmethod
+    def _score_all(doc_ids, weighted, limit):
+        """Top `limit` of doc_ids by score, computed a term at a time with C-level maps"""
+        doc_ids = list(doc_ids)
+        scores = [0.0] * len(doc_ids)
+        for postings, idf in weighted:
+            scores = list(map(operator.add, scores, map(idf.__mul__, map(postings.__getitem__, doc_ids))))
+        return heapq.nlargest(limit, zip(scores, doc_ids))
+
+    def _idf(self, term):
+        df = len(self._postings[term])
+        return math.log(1 + (len(self._doc_terms) - df + 0.5) / (df + 0.5))
+
+    def search(self, query, limit):
+        """Returns (total_matches, [(score, doc_id), ...]) for the best `limit` matches"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or any(term not in self._postings for term in terms):
+            return 0, []
+
+        if len(terms) == 1:
+            term = terms[0]
+            idf = self._idf(term)
+            return len(self._postings[term]), [(-neg_weight * idf, doc_id)
+                                               for neg_weight, doc_id in self._ranked_list(term)[:limit]]
+
+        terms.sort(key=lambda t: len(self._postings[t]))
+        postings = [self._postings[t] for t in terms]
+        idfs = [self._idf(t) for t in terms]
+        lists = [self._ranked_list(t) for t in terms]
+
+        # Exact match count from a C-level intersection, smallest postings first
+        matching = postings[0].keys() & postings[1].keys()
+        for other in postings[2:]:
+            matching &= other.keys()
+        if not matching:
+            return 0, []
+
+        weighted = list(zip(postings, idfs))
+        top = []  # min-heap of the best `limit` (score, doc_id)
+        seen = set()
+        for depth in range(len(lists[0])):
+            if depth * len(lists) > len(matching) // 4:
+                # The lists rank the terms too differently for an early stop;
+                # scoring every match now costs about as much as the walk so far
+                return len(matching), self._score_all(matching, weighted, limit)
+            threshold = 0.0
+            for ranked, idf in zip(lists, idfs):
+                neg_weight, doc_id = ranked[depth]
+                threshold -= neg_weight * idf
+                if doc_id in seen or doc_id not in matching:
+                    continue
+                seen.add(doc_id)
+                score = sum(p[doc_id] * i for p, i in weighted)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, doc_id))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, doc_id))
+            # An unseen document is below every list's current depth, so it
+            # scores at most the threshold; stop once the top k all beat it
+            if len(seen) == len(matching) or (len(top) == limit and top[0][0] >= threshold):
+                break
+
+        return len(matching), sorted(top, reverse=True)
@@ -0,0 +1,89 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is always available
+    orjson = None
+
+
+def _to_json(obj):
+    """Fallback hook: record types (core.records.Record) expose a to_dict() view"""
+    to_dict = getattr(obj, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+# ---------------------------------------------------------------------------
+# Response encoding: whatever is fastest on this machine
+# ---------------------------------------------------------------------------
+
+_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_to_json)
+_SORTED_COMPACT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False,
+                                           sort_keys=True, default=_to_json)
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    JSON_BACKEND = 'orjson'
+else:
+    JSON_BACKEND = 'json'
+
+
+def dumps(obj, sort_keys=False):
+    """Encodes obj as compact UTF-8 JSON bytes for API responses"""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=_to_json, option=options)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; let the stdlib handle it
+    encoder = _SORTED_COMPACT_ENCODER if sort_keys else _COMPACT_ENCODER
+    return encoder.encode(obj).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ---------------------------------------------------------------------------
+# Event log encoding
+# ---------------------------------------------------------------------------
+# orjson writes NaN and Infinity as null, which replays as a different value
+# (and breaks the record it feeds). An event that cannot round-trip must fail
+# before it is appended, so the log uses the stdlib encoder with allow_nan=False.
+
+_STRICT_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False,
+                                   allow_nan=False, default=_to_json)
+
+
+def dumps_strict(obj):
+    """Compact UTF-8 JSON bytes; raises ValueError for NaN or Infinity"""
+    return _STRICT_ENCODER.encode(obj).encode('utf-8')
+
+
+# ---------------------------------------------------------------------------
+# Canonical encoding for block hashing
+# ---------------------------------------------------------------------------
+# This must never change with the response encoder: a block hash is a promise
+# about exact bytes. New encodings get a new version number instead.
+#
+# Version 1 is byte-for-byte what Blockchain.hash always produced:
+# json.dumps(block, sort_keys=True) with default separators and ASCII escaping.
+# Records encode exactly like the dicts they replaced. Reusing one encoder
+# instance avoids rebuilding it on every call.
+
+CANONICAL_VERSION = 1
+
+_CANONICAL_ENCODERS = {
+    1: json.JSONEncoder(sort_keys=True, default=_to_json)
+}
+
+
+def canonical_bytes(obj, version=CANONICAL_VERSION):
+    """Stable byte encoding of obj used as the input to block hashes"""
+    encoder = _CANONICAL_ENCODERS.get(version)
+    if encoder is None:
+        raise ValueError(f"Unknown canonical encoding version: {version}")
+    return encoder.encode(obj).encode('ascii')
@@ -0,0 +1,239 @@
+import functools
+import threading
+
+from core.blockchain import Blockchain
+from core.verifier import GeoSentinel
+from core.marketplace import CarbonMarketplace
+from core.eventstore import EventStore
+from core.concurrency import SingleFlight
+from core import metrics
+from core.export import export_chain
+from core.workload import load_workload
+
+# Directory for the marketplace event log and snapshots; unset keeps state in memory only
+DATA_DIR_ENV = 'MARKETPLACE_DATA_DIR'
+
+
+def _serialized(method):
+    """Runs the method under the service lock so chain appends and matching never interleave"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class GeoVerifyService:
+    """
+    Single owner of the Blockchain, GeoSentinel and CarbonMarketplace state.
+    The Flask app talks only to this object: in development it lives in the
+    same process, in production it lives in the writer process (core/cluster.py)
+    and every worker reaches it over local IPC, so there is exactly one chain.
+
+    Limitation: every state method runs under one RLock, shared by
+    verifications and marketplace calls from all workers. Admission control
+    (app.py) caps threads per worker, not time spent waiting here, so with W
+    workers up to W * VERIFY_MAX_CONCURRENT verifications can queue ahead of
+    a marketplace read, and a synthetic load blocks everything until done.
+    """
+    def __init__(self, blockchain=None, sentinel=None, marketplace=None, data_dir=None):
+        self.blockchain = blockchain or Blockchain()
+        self.sentinel = sentinel or GeoSentinel()
+        if marketplace is None:
+            event_store = EventStore(data_dir) if data_dir else None
+            marketplace = CarbonMarketplace(self.blockchain, event_store=event_store)
+        self.marketplace = marketplace
+        self._lock = threading.RLock()
+        # Concurrent verifications of the same cell share one result and one block
+        self._verify_flights = SingleFlight()
+
+    # ============ STATUS ============
+
+    @_serialized
+    def get_status(self):
+        """Counters used by /api/health and the metrics gauges"""
+        return {
+            'chain_height': len(self.blockchain.chain),
+            'verifications': len(self.sentinel.verification_history),
+            'active_listings': self.marketplace.get_market_stats()['active_listings'],
+            'coalesced_verifications': self._verify_flights.coalesced
+        }
+
+    # Metrics live in the process that owns the state, so spans around
+    # sentinel, chain and matching calls are recorded where they run. These
+    # take only the registry's own lock, never the service lock.
+
+    def record_metrics(self, observations):
+        """Receives request/span observations batched by request workers"""
+        metrics.registry.record_batch(observations)
+
+    def render_metrics(self):
+        """Request and span histograms of the whole deployment, Prometheus text"""
+        return metrics.registry.render_prometheus()
+
+    # ============ VERIFICATION AND LEDGER ============
+
+    # Cell size used to coalesce verifications; matches the sentinel's ~500m double-counting radius
+    COALESCE_CELL_DEGREES = 0.005
+
+    def verify_and_record(self, lat, lon):
+        """
+        Verifies a location and mines a block holding the result.
+        Requests for the same cell that arrive while one is in flight get
+        that result (marked coalesced) instead of mining their own block.
+        """
+        cell = (round(lat / self.COALESCE_CELL_DEGREES), round(lon / self.COALESCE_CELL_DEGREES))
+        result, shared = self._verify_flights.do(cell, lambda: self._verify_and_record(lat, lon))
+        if shared:
+            result = dict(result, coalesced=True)
+        return result
+
+    @_serialized
+    def _verify_and_record(self, lat, lon):
+        # 1. AI Verification
+        verification_result = self.sentinel.verify_location(lat, lon)
+
+        # 2. Blockchain Recording (Mining)
+        # In a real app, this would be more complex. Here we simulate mining a block for this transaction.
+        last_block = self.blockchain.get_last_block()
+        proof = last_block.proof + 1 # Simplified Proof of Work
+        previous_hash = self.blockchain.hash(last_block)
+
+        new_block = self.blockchain.create_block(proof, previous_hash)
+        new_block.data.append(verification_result.to_dict()) # Add the data to the block
+
+        return {
+            "verification": verification_result,
+            "block_index": new_block.index,
+            "block_hash": self.blockchain.hash(new_block)
+        }
+
+    @_serialized
+    def estimate(self, lat, lon):
+        """AI Verification (Estimation only)"""
+        return self.sentinel.verify_location(lat, lon)
+
+    @_serialized
+    def get_chain(self):
+        return {
+            'chain': list(self.blockchain.chain),
+            'length': len(self.blockchain.chain),
+            'hash_version': self.blockchain.hash_version
+        }
+
+    @_serialized
+    def get_audit_log(self):
+        """Flattens every block payload into audit log entries"""
+        audit_entries = []
+
+        for block in self.blockchain.chain:
+            for data_entry in block.data:
+                audit_entries.append({
+                    'timestamp': block.timestamp,
+                    'block_index': block.index,
+                    'block_hash': self.blockchain.hash(block)[:16] + '...',
+                    'location': f"({data_entry.get('latitude', 'N/A')}, {data_entry.get('longitude', 'N/A')})",
+                    'status': data_entry.get('status', 'UNKNOWN'),
+                    'carbon_credits': data_entry.get('carbon_credits', 0),
+                    'green_cover': data_entry.get('green_cover_percentage', 0)
+                })
+
+        return audit_entries
+
+    def export_audit_trail(self, output_dir, **options):
+        """
+        Bulk export of the chain to columnar files (see core/export.py).
+        Blocks are mined and filled under the service lock, so the count read
+        under it covers only complete blocks; the export itself runs outside.
+        """
+        with self._lock:
+            sealed_blocks = len(self.blockchain.chain)
+        return export_chain(self.blockchain, output_dir, sealed_blocks=sealed_blocks, **options)
+
+    @_serialized
+    def load_synthetic_workload(self, **options):
+        """
+        Bulk-loads generated companies, verifications, listings and orders
+        (see core/workload.py) and returns the ingest throughput report.
+        Holds the service lock for the whole load.
+        """
+        return load_workload(self.blockchain, self.sentinel, self.marketplace, **options)
+
+    @_serialized
+    def get_verification_history(self):
+        return list(self.sentinel.get_verification_history())
+
+    # ============ MARKETPLACE ============
+
+    @_serialized
+    def register_company(self, company_name, industry, country, wallet_address, email=None):
+        return self.marketplace.register_company(company_name, industry, country, wallet_address, email)
+
+    @_serialized
+    def send_inquiry(self, listing_id, buyer_id):
+        return self.marketplace.send_inquiry(listing_id, buyer_id)
+
+    @_serialized
+    def create_listing(self, seller_id, credit_amount, price_per_credit,
+                       verification_data, location, description="",
+                       latitude=None, longitude=None):
+        """
+        Coordinates sent by the client are only a claim: they must fall within
+        the double-counting radius of a VERIFIED sentinel result, and the
+        listing takes that result's position and data instead of the request's.
+        A listing without coordinates is accepted but never geo-indexed.
+        """
+        verification_data = verification_data or {}
+        if latitude is None and longitude is None:
+            latitude = verification_data.get('latitude')
+            longitude = verification_data.get('longitude')
+        if latitude is not None or longitude is not None:
+            try:
+                latitude, longitude = float(latitude), float(longitude)
+            except (TypeError, ValueError):
+                return {"success": False, "error": "Latitude and longitude must both be numbers"}
+            verified = self.sentinel.find_verified(latitude, longitude)
+            if verified is None:
+                return {"success": False,
+                        "error": "No VERIFIED GeoSentinel result at these coordinates; verify the location first"}
+            verification_data = verified.to_dict()
+            latitude, longitude = verified.latitude, verified.longitude
+        return self.marketplace.create_listing(seller_id, credit_amount, price_per_credit,
+                                               verification_data, location, description,
+                                               latitude, longitude)
+
+    @_serialized
+    def get_active_listings(self, filters=None):
+        return self.marketplace.get_active_listings(filters)
+
+    @_serialized
+    def search(self, query, kind='all', page=1, per_page=20):
+        return self.marketplace.search(query, kind, page, per_page)
+
+    @_serialized
+    def create_buy_order(self, buyer_id, credit_amount, max_price_per_credit):
+        return self.marketplace.create_buy_order(buyer_id, credit_amount, max_price_per_credit)
+
+    @_serialized
+    def get_transaction_history(self, company_id=None):
+        return list(self.marketplace.get_transaction_history(company_id))
+
+    @_serialized
+    def get_market_stats(self):
+        return self.marketplace.get_market_stats()
+
+    @_serialized
+    def get_market_intelligence(self):
+        return self.marketplace.get_market_intelligence()
+
+    @_serialized
+    def predict_carbon_footprint(self, production_data):
+        return self.marketplace.predict_carbon_footprint(production_data)
+
+    @_serialized
+    def get_company_profile(self, company_id):
+        return self.marketplace.get_company_profile(company_id)
+
+    @_serialized
+    def get_companies(self):
+        return list(self.marketplace.companies.values())
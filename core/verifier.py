@@ -1,41 +1,121 @@
+import math
 import random
 import time
 
+from core.metrics import timed
+from core.records import Record
+
+class VerificationResult(Record):
+    """Outcome of a single GeoSentinel verification"""
+    __slots__ = ('latitude', 'longitude', 'green_cover_percentage', 'ai_confidence',
+                 'status', 'carbon_credits', 'reasons', 'timestamp')
+
+    def __init__(self, latitude, longitude, green_cover_percentage, ai_confidence,
+                 status, carbon_credits, reasons, timestamp):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.green_cover_percentage = green_cover_percentage
+        self.ai_confidence = ai_confidence
+        self.status = status
+        self.carbon_credits = carbon_credits
+        self.reasons = reasons
+        self.timestamp = timestamp
+
 class GeoSentinel:
     """
     AI-driven component that simulates the analysis of satellite imagery
     to verify carbon assets.
     """
+    # Roughly 0.005 approx 500m: two VERIFIED results closer than this on both axes are the same asset
+    DOUBLE_COUNT_DEGREES = 0.005
+
     def __init__(self):
         self.green_threshold = 45.0
         self.confidence_threshold = 0.80
         self.verification_history = []  # Track all verifications
+        self._verified_cells = {}  # ~500m grid cell -> VERIFIED results inside it
 
+    @timed('sentinel.verify_location')
     def verify_location(self, lat, lon):
         """
         Simulates fetching a satellite image and running a deep learning model.
         Returns a verification result with detailed reasons.
         """
-        reasons = []
-        
         # 0. ANTI-DOUBLE COUNTING CHECK
         # Check if coordinates within a 500m radius have already been verified
-        for past in self.verification_history:
-            if past['status'] == "VERIFIED":
-                dist_lat = abs(lat - past['latitude'])
-                dist_lon = abs(lon - past['longitude'])
-                # Roughly 0.005 approx 500m
-                if dist_lat < 0.005 and dist_lon < 0.005:
-                    return {
-                        "latitude": lat,
-                        "longitude": lon,
-                        "green_cover_percentage": past['green_cover_percentage'],
-                        "ai_confidence": 100.0,
-                        "status": "FLAGGED",
-                        "carbon_credits": 0.0,
-                        "reasons": ["CRITICAL: Potential Double Counting Detected", f"Asset already recorded in Block #{random.randint(100,999)}"],
-                        "timestamp": time.time()
-                    }
+        past = self.find_verified(lat, lon)
+        if past is not None:
+            return self._double_counted(lat, lon, past)
+
+        result = self._assess(lat, lon)
+        
+        # Store in history
+        self.verification_history.append(result)
+        self._remember(result)
+        
+        return result
+
+    def verify_batch(self, coordinates):
+        """
+        Bulk-ingest path: assesses every (lat, lon) and stores the results in one
+        go. The double-counting check still applies, against the history and
+        the earlier entries of the batch; those results come back FLAGGED and,
+        as in verify_location, are not stored.
+        """
+        results = []
+        for lat, lon in coordinates:
+            past = self.find_verified(lat, lon)
+            if past is not None:
+                results.append(self._double_counted(lat, lon, past))
+                continue
+            result = self._assess(lat, lon)
+            self.verification_history.append(result)
+            self._remember(result)
+            results.append(result)
+        return results
+
+    def _double_counted(self, lat, lon, past):
+        return VerificationResult(
+            latitude=lat,
+            longitude=lon,
+            green_cover_percentage=past.green_cover_percentage,
+            ai_confidence=100.0,
+            status="FLAGGED",
+            carbon_credits=0.0,
+            reasons=["CRITICAL: Potential Double Counting Detected", f"Asset already recorded in Block #{random.randint(100,999)}"],
+            timestamp=time.time()
+        )
+
+    def _cell(self, lat, lon):
+        return (math.floor(lat / self.DOUBLE_COUNT_DEGREES), math.floor(lon / self.DOUBLE_COUNT_DEGREES))
+
+    def _remember(self, result):
+        if result.status == "VERIFIED":
+            self._verified_cells.setdefault(self._cell(result.latitude, result.longitude), []).append(result)
+
+    def find_verified(self, lat, lon):
+        """
+        Returns the closest VERIFIED result within the double-counting radius
+        of (lat, lon), or None. Only the 3x3 grid cells around the point can
+        hold such a result, so this does not scan the whole history.
+        """
+        radius = self.DOUBLE_COUNT_DEGREES
+        row, col = self._cell(lat, lon)
+        best, best_distance = None, None
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                for past in self._verified_cells.get((row + d_row, col + d_col), ()):
+                    dist_lat = abs(lat - past.latitude)
+                    dist_lon = abs(lon - past.longitude)
+                    if dist_lat < radius and dist_lon < radius:
+                        distance = dist_lat + dist_lon
+                        if best is None or distance < best_distance:
+                            best, best_distance = past, distance
+        return best
+
+    def _assess(self, lat, lon):
+        """Runs the simulated imagery model for one location"""
+        reasons = []
 
         # 1. SPECIAL DEMO WHITELIST
         # If the user enters the specific demo coordinates, give a perfect result.
@@ -119,21 +199,16 @@ class GeoSentinel:
             carbon_credits = 0.0
 
 
-        result = {
-            "latitude": lat,
-            "longitude": lon,
-            "green_cover_percentage": round(green_cover, 2),
-            "ai_confidence": round(authenticity_score * 100, 1),
-            "status": status,
-            "carbon_credits": round(carbon_credits, 2),
-            "reasons": reasons,
-            "timestamp": time.time()
-        }
-        
-        # Store in history
-        self.verification_history.append(result)
-        
-        return result
+        return VerificationResult(
+            latitude=lat,
+            longitude=lon,
+            green_cover_percentage=round(green_cover, 2),
+            ai_confidence=round(authenticity_score * 100, 1),
+            status=status,
+            carbon_credits=round(carbon_credits, 2),
+            reasons=reasons,
+            timestamp=time.time()
+        )
 
     
     def get_verification_history(self):
@@ -0,0 +1,276 @@
+"""
+Synthetic workload generator for capacity testing.
+
+Produces companies, geo-distributed verifications, listings and buy orders
+and loads them through the bulk-ingest paths of GeoSentinel, Blockchain and
+CarbonMarketplace, reporting ingest throughput per phase.
+
+    python -m core.workload --companies 100000 --verifications 1000000 \\
+        --listings 500000 --orders 500000 --seed 42
+"""
+import argparse
+import json
+import math
+import random
+import time
+
+CELL_DEGREES = 0.005  # GeoSentinel's double-counting radius
+
+INDUSTRIES = [
+    ('Manufacturing', 30), ('Steel', 10), ('Cement', 8), ('Chemicals', 8), ('Energy', 12),
+    ('Automotive', 8), ('Logistics', 8), ('Forestry', 6), ('Agriculture', 6), ('Textiles', 4)
+]
+COUNTRIES = [
+    ('India', 18), ('United States', 16), ('China', 14), ('Germany', 8), ('Brazil', 8),
+    ('Japan', 6), ('United Kingdom', 6), ('Indonesia', 5), ('France', 5), ('Kenya', 3),
+    ('Canada', 4), ('Australia', 4), ('Mexico', 3)
+]
+NAME_PREFIXES = ['Green', 'Eco', 'Terra', 'Blue', 'Clean', 'Bright', 'Nova', 'Prime', 'Sun', 'River']
+NAME_SUFFIXES = ['Industries', 'Works', 'Solutions', 'Holdings', 'Labs', 'Group', 'Corp', 'Systems']
+
+# Forested regions where most verified projects sit: (name, lat, lon, spread in degrees, weight)
+HOTSPOTS = [
+    ('Amazon Basin', -4.0, -62.0, 5.0, 22), ('Congo Basin', -1.0, 21.0, 4.0, 14),
+    ('Borneo', 0.5, 114.0, 2.5, 10), ('Western Ghats', 11.4, 76.7, 1.5, 8),
+    ('Sumatra', 0.0, 101.5, 2.0, 6), ('Scandinavian Boreal', 63.0, 17.0, 3.0, 8),
+    ('Pacific Northwest', 46.0, -122.0, 2.5, 8), ('Atlantic Forest', -22.0, -45.0, 2.5, 6),
+    ('Siberian Taiga', 60.0, 95.0, 6.0, 8), ('Central America', 15.0, -88.0, 2.0, 5),
+    ('Eastern Australia', -28.0, 152.0, 2.0, 5)
+]
+HOTSPOT_SHARE = 0.85  # the rest is spread uniformly over inhabited latitudes
+
+PROJECT_TYPES = [
+    'Reforestation project', 'Protected rainforest area', 'Mangrove restoration',
+    'Agroforestry program', 'Improved forest management', 'Peatland conservation'
+]
+
+BASE_PRICE = 24.50  # matches the seed of the marketplace price history
+
+
+class WorkloadGenerator:
+    """
+    Deterministic (given a seed) source of synthetic records.
+    A coordinate is only produced if no earlier one, and no point in
+    taken_points, lies within CELL_DEGREES of it on both axes: that is
+    GeoSentinel's double-counting test, so generated verifications pass it
+    and, given the coordinates of listings on sale, listing locations are unique.
+    """
+    def __init__(self, seed=None, taken_points=()):
+        self.random = random.Random(seed)
+        self._points = {}  # cell -> [(lat, lon)] produced or taken
+        for lat, lon in taken_points:
+            self._points.setdefault(self.cell(lat, lon), []).append((lat, lon))
+        self._industries, self._industry_weights = zip(*INDUSTRIES)
+        self._countries, self._country_weights = zip(*COUNTRIES)
+        self._hotspot_weights = [h[4] for h in HOTSPOTS]
+
+    @staticmethod
+    def cell(lat, lon):
+        return (math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES))
+
+    def companies(self, count):
+        rng = self.random
+        for number in range(count):
+            country = rng.choices(self._countries, self._country_weights)[0]
+            yield {
+                'name': f"{rng.choice(NAME_PREFIXES)}{rng.choice(NAME_SUFFIXES)} {number}",
+                'industry': rng.choices(self._industries, self._industry_weights)[0],
+                'country': country,
+                'wallet_address': f"0x{rng.getrandbits(160):040x}"
+            }
+
+    def coordinates(self, count):
+        """Yields (region, lat, lon), clustered around forest hotspots"""
+        rng = self.random
+        produced = 0
+        while produced < count:
+            if rng.random() < HOTSPOT_SHARE:
+                region, lat, lon, spread, _ = rng.choices(HOTSPOTS, self._hotspot_weights)[0]
+                lat = min(89.9, max(-89.9, rng.gauss(lat, spread)))
+                lon = (rng.gauss(lon, spread) + 180.0) % 360.0 - 180.0
+            else:
+                region = 'Unclassified'
+                lat, lon = rng.uniform(-55.0, 70.0), rng.uniform(-180.0, 180.0)
+            lat, lon = round(lat, 6), round(lon, 6)
+            if self._near_taken(lat, lon):
+                continue
+            self._points.setdefault(self.cell(lat, lon), []).append((lat, lon))
+            produced += 1
+            yield region, lat, lon
+
+    def _near_taken(self, lat, lon):
+        """Whether a point within CELL_DEGREES on both axes exists; only the 3x3 cells around can hold one"""
+        row, col = self.cell(lat, lon)
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                for other_lat, other_lon in self._points.get((row + d_row, col + d_col), ()):
+                    if abs(lat - other_lat) < CELL_DEGREES and abs(lon - other_lon) < CELL_DEGREES:
+                        return True
+        return False
+
+    def listing(self, seller_id, region, lat, lon, verification=None):
+        """Credit sizes are log-normal; prices track the market, with a premium for green cover"""
+        rng = self.random
+        green_cover = verification['green_cover_percentage'] if verification else rng.uniform(45, 98)
+        price = rng.gauss(BASE_PRICE, BASE_PRICE * 0.12) * (0.8 + 0.4 * green_cover / 100)
+        return {
+            'seller_id': seller_id,
+            'credit_amount': round(rng.lognormvariate(math.log(150), 1.0), 2),
+            'price_per_credit': round(max(1.0, price), 2),
+            'verification_data': verification or {'latitude': lat, 'longitude': lon},
+            'location': f"{region} ({lat:.5f}, {lon:.5f})",
+            'description': f"{rng.choice(PROJECT_TYPES)} in {region}",
+            'latitude': lat,
+            'longitude': lon
+        }
+
+    def order(self, buyer_id):
+        rng = self.random
+        return {
+            'buyer_id': buyer_id,
+            'credit_amount': round(rng.lognormvariate(math.log(80), 0.9), 2),
+            'max_price_per_credit': round(max(1.0, rng.gauss(BASE_PRICE * 1.05, BASE_PRICE * 0.1)), 2)
+        }
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_workload(blockchain, sentinel, marketplace, companies=1000, verifications=1000,
+                  listings=1000, orders=1000, seed=None, batch_size=10_000,
+                  entries_per_block=1000):
+    """
+    Generates and bulk-loads a synthetic workload. Verification results are
+    packed entries_per_block to a block. Listings sit on VERIFIED results
+    only, as GeoVerifyService.create_listing requires: they reuse the ones
+    just loaded, then verify (and record) fresh coordinates until there are
+    enough, so the chain can hold more than `verifications` results.
+    Returns the throughput report.
+    """
+    if min(companies, verifications, listings, orders) < 0:
+        raise ValueError("Record counts must not be negative")
+    if (listings or orders) and not (companies or marketplace.companies):
+        raise ValueError("Listings and orders need at least one company")
+
+    # Points new coordinates must keep their distance from: earlier VERIFIED
+    # results (double counting) and listings still on sale (duplicate locations)
+    taken = [(r.latitude, r.longitude) for r in sentinel.verification_history if r.status == "VERIFIED"]
+    taken.extend((l.latitude, l.longitude) for l in marketplace.active_listings.values()
+                 if l.latitude is not None)
+    generator = WorkloadGenerator(seed, taken_points=taken)
+    rng = generator.random
+    phases = {}
+
+    def timed_phase(name, run):
+        start = time.perf_counter()
+        records = run()
+        seconds = time.perf_counter() - start
+        phases[name] = {
+            'records': records,
+            'seconds': round(seconds, 3),
+            'per_second': round(records / seconds) if seconds > 0 else None
+        }
+
+    company_ids = []
+
+    def load_companies():
+        for batch in _batches(generator.companies(companies), batch_size):
+            company_ids.extend(marketplace.bulk_register_companies(batch))
+        return len(company_ids)
+
+    verified = []
+    blocks_before = len(blockchain.chain)
+
+    def record_verifications(batch):
+        """Verifies (region, lat, lon) points into blocks; returns the VERIFIED (region, result) pairs"""
+        results = sentinel.verify_batch([(lat, lon) for _, lat, lon in batch])
+        blockchain.append_entries([r.to_dict() for r in results], entries_per_block)
+        return [(region, r) for (region, _, _), r in zip(batch, results) if r.status == "VERIFIED"]
+
+    def load_verifications():
+        loaded = 0
+        for batch in _batches(generator.coordinates(verifications), batch_size):
+            verified.extend(record_verifications(batch))
+            loaded += len(batch)
+        return loaded
+
+    traders = []  # filled once the companies phase has run
+
+    def listing_source():
+        sources = verified[:listings]
+        missing = listings - len(sources)
+        while True:
+            for region, result in sources:
+                yield generator.listing(rng.choice(traders), region, result.latitude,
+                                        result.longitude, result.to_dict())
+            if missing <= 0:
+                return
+            # Some fresh points get FLAGGED; ask for twice what is missing
+            sources = record_verifications(list(generator.coordinates(min(batch_size, 2 * missing))))
+            sources = sources[:missing]
+            missing -= len(sources)
+
+    def load_listings():
+        loaded = 0
+        for batch in _batches(listing_source(), batch_size):
+            loaded += len(marketplace.bulk_create_listings(batch))
+        return loaded
+
+    def load_orders():
+        loaded = 0
+        source = (generator.order(rng.choice(traders)) for _ in range(orders))
+        for batch in _batches(source, batch_size):
+            loaded += len(marketplace.bulk_place_orders(batch))
+        return loaded
+
+    timed_phase('companies', load_companies)
+    traders.extend(company_ids or marketplace.companies)
+    timed_phase('verifications', load_verifications)
+    timed_phase('listings', load_listings)
+    timed_phase('orders', load_orders)
+
+    records = sum(p['records'] for p in phases.values())
+    seconds = sum(p['seconds'] for p in phases.values())
+    return {
+        'seed': seed,
+        'phases': phases,
+        'blocks_mined': len(blockchain.chain) - blocks_before,
+        'verified': len(verified),
+        'total': {
+            'records': records,
+            'seconds': round(seconds, 3),
+            'per_second': round(records / seconds) if seconds > 0 else None
+        }
+    }
+
+
+if __name__ == '__main__':
+    from core.service import GeoVerifyService
+
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic GeoVerify workload")
+    parser.add_argument('--companies', type=int, default=10_000)
+    parser.add_argument('--verifications', type=int, default=100_000)
+    parser.add_argument('--listings', type=int, default=50_000)
+    parser.add_argument('--orders', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--entries-per-block', type=int, default=1000)
+    parser.add_argument('--data-dir', default=None,
+                        help="persist the marketplace event log here (as MARKETPLACE_DATA_DIR)")
+    args = parser.parse_args()
+
+    service = GeoVerifyService(data_dir=args.data_dir)
+    report = service.load_synthetic_workload(
+        companies=args.companies, verifications=args.verifications,
+        listings=args.listings, orders=args.orders, seed=args.seed,
+        batch_size=args.batch_size, entries_per_block=args.entries_per_block
+    )
+    print(json.dumps(report, indent=2))
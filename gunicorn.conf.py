@@ -0,0 +1,27 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:app
+#
+# The master starts one GeoVerify state writer before forking; every worker
+# connects to it (see core/cluster.py), so all workers share one chain and
+# one order book while the workers themselves stay stateless.
+import os
+
+from core import cluster
+
+bind = os.environ.get("GEOVERIFY_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("GEOVERIFY_WORKERS", "4"))
+threads = int(os.environ.get("GEOVERIFY_THREADS", "4"))
+# Workers size verification admission control from this (see app.py)
+os.environ["GEOVERIFY_THREADS"] = str(threads)
+
+_writer = None
+
+
+def on_starting(server):
+    global _writer
+    _writer = cluster.start_writer()
+    server.log.info("GeoVerify state writer running at %s", os.environ[cluster.ADDRESS_ENV])
+
+
+def on_exit(server):
+    if _writer is not None:
+        _writer.terminate()
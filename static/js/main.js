@@ -110,6 +110,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     sellModal.classList.remove('hidden');
                     document.getElementById('creditAmount').value = data.carbon_credits;
                     document.getElementById('creditLocation').value = `${data.latitude}, ${data.longitude}`;
+                    document.getElementById('creditLatitude').value = data.latitude;
+                    document.getElementById('creditLongitude').value = data.longitude;
                 }
             };
 
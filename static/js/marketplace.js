@@ -530,6 +530,15 @@ document.addEventListener('DOMContentLoaded', () => {
             }
         };
 
+        // Coordinates of the scan this listing came from, if any; the server
+        // replaces the verification data with its own VERIFIED result
+        const latitude = document.getElementById('creditLatitude');
+        const longitude = document.getElementById('creditLongitude');
+        if (latitude && longitude && latitude.value !== '' && longitude.value !== '') {
+            formData.latitude = parseFloat(latitude.value);
+            formData.longitude = parseFloat(longitude.value);
+        }
+
         try {
             const response = await fetch('/api/marketplace/create-listing', {
                 method: 'POST',
@@ -544,8 +553,12 @@ document.addEventListener('DOMContentLoaded', () => {
                 resultDiv.textContent = `✅ Listing created! ID: ${data.listing.listing_id}`;
                 resultDiv.classList.remove('hidden');
 
-                // Clear form
+                // Clear form (reset() leaves hidden inputs alone)
                 e.target.reset();
+                if (latitude && longitude) {
+                    latitude.value = '';
+                    longitude.value = '';
+                }
 
                 // Refresh listings
                 setTimeout(() => {
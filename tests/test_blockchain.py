@@ -0,0 +1,22 @@
+from core.blockchain import Blockchain
+
+
+def _mine(blockchain, entry):
+    last_block = blockchain.get_last_block()
+    block = blockchain.create_block(last_block.proof + 1, blockchain.hash(last_block))
+    block.data.append(entry)
+    return block
+
+
+def test_tampering_with_a_sealed_block_is_detected():
+    blockchain = Blockchain()
+    for i in range(3):
+        _mine(blockchain, {'latitude': 10.0 + i, 'longitude': 20.0, 'carbon_credits': 5.0})
+    # Hash every block once, as the audit log and export do
+    hashes = [blockchain.hash(block) for block in blockchain.chain]
+    assert blockchain.is_chain_valid(blockchain.chain)
+
+    blockchain.chain[1].data[0]['carbon_credits'] = 999.0
+
+    assert not blockchain.is_chain_valid(blockchain.chain)
+    assert blockchain.hash(blockchain.chain[1]) != hashes[1]
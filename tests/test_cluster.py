@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import secrets
+
+import pytest
+
+from core import cluster
+from core.blockchain import Blockchain
+from core.metrics import MetricsRegistry
+
+WORKERS = 4
+VERIFICATIONS_PER_WORKER = 15
+
+
+def _worker(number, address, authkey, errors):
+    try:
+        service = cluster.connect(address, authkey)
+        company = service.register_company(f"Worker {number} Ltd", 'Steel', 'India', '0xwallet')
+        for i in range(VERIFICATIONS_PER_WORKER):
+            # Distinct ~500m cells per worker and call, so every verification mines a block
+            service.verify_and_record(10.0 + number, 20.0 + i * 0.1)
+        service.create_listing(seller_id=company, credit_amount=10.0, price_per_credit=20.0,
+                               verification_data={}, location=f"Plot {number}")
+        service.create_buy_order(company, 5.0, 25.0)
+    except Exception as e:  # surfaced in the parent through the exit code
+        errors.put(repr(e))
+        raise
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    # start_writer exports these; monkeypatch restores the environment afterwards
+    monkeypatch.setenv(cluster.ADDRESS_ENV, str(tmp_path / 'state.sock'))
+    monkeypatch.setenv(cluster.AUTHKEY_ENV, secrets.token_hex(16))
+    monkeypatch.delenv('MARKETPLACE_DATA_DIR', raising=False)
+    process = cluster.start_writer()
+    yield os.environ[cluster.ADDRESS_ENV], os.environ[cluster.AUTHKEY_ENV]
+    process.terminate()
+    process.join(timeout=10)
+
+
+def test_four_workers_share_one_consistent_chain(writer):
+    address, authkey = writer
+    errors = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_worker, args=(n, address, authkey, errors))
+               for n in range(WORKERS)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=120)
+    assert all(p.exitcode == 0 for p in workers), errors.get() if not errors.empty() else workers
+
+    service = cluster.connect(address, authkey)
+    chain = service.get_chain()['chain']
+
+    assert Blockchain().is_chain_valid(chain)
+    assert [block.index for block in chain] == list(range(1, len(chain) + 1))
+    verifications = [entry for block in chain for entry in block.data if 'latitude' in entry]
+    trades = [entry for block in chain for entry in block.data
+              if entry.get('type') == 'CARBON_CREDIT_TRADE']
+    assert len(verifications) == WORKERS * VERIFICATIONS_PER_WORKER
+    # Each worker's buy order matches some worker's listing and mines one trade block
+    assert len(trades) == WORKERS
+    assert len(chain) == 1 + len(verifications) + len(trades)
+    assert service.get_market_stats()['total_companies'] == WORKERS
+
+    # Spans ran in the writer and are served from there
+    assert 'span="sentinel.verify_location"' in service.render_metrics()
+
+
+def test_forwarded_observations_land_in_the_receiving_registry():
+    writer_registry = MetricsRegistry()
+    worker_registry = MetricsRegistry()
+    worker_registry.forward_to(writer_registry.record_batch, max_batch=2, max_delay=60)
+
+    worker_registry.observe_request('POST', '/api/verify', 200, 0.05)
+    worker_registry.observe_span('send_real_email', 0.2)
+    worker_registry.observe_request('GET', '/api/health', 200, 0.01)
+    worker_registry.flush()
+
+    rendered = writer_registry.render_prometheus()
+    assert 'endpoint="/api/verify"' in rendered and 'endpoint="/api/health"' in rendered
+    assert 'span="send_real_email"' in rendered
+    # The forwarding side keeps no histograms of its own
+    assert 'http_request_duration_seconds' not in worker_registry.render_prometheus()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+import app as geoverify_app
+from core.concurrency import AdmissionController
+from core.service import GeoVerifyService
+
+CALLERS = 6
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _concurrent_verifications(service, verify_location):
+    """Runs CALLERS same-cell verify_and_record calls, releasing the leader once all have joined"""
+    gate = threading.Event()
+
+    def gated(lat, lon):
+        gate.wait(5)
+        return verify_location(lat, lon)
+
+    service.sentinel.verify_location = gated
+    outcomes = [None] * CALLERS
+
+    def call(number):
+        try:
+            outcomes[number] = service.verify_and_record(11.4102 + number * 0.0001, 76.6950)
+        except Exception as e:
+            outcomes[number] = e
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: service._verify_flights.coalesced == CALLERS - 1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_same_cell_verifications_share_one_block():
+    service = GeoVerifyService()
+    height = len(service.blockchain.chain)
+    outcomes = _concurrent_verifications(service, service.sentinel.verify_location)
+
+    assert len(service.blockchain.chain) == height + 1
+    assert len(service.sentinel.verification_history) == 1
+    assert {outcome['block_index'] for outcome in outcomes} == {height + 1}
+    assert sum(1 for outcome in outcomes if outcome.get('coalesced')) == CALLERS - 1
+
+
+def test_leader_error_reaches_followers():
+    service = GeoVerifyService()
+    height = len(service.blockchain.chain)
+
+    def failing(lat, lon):
+        raise RuntimeError("imagery unavailable")
+
+    outcomes = _concurrent_verifications(service, failing)
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert len(service.blockchain.chain) == height
+    # Nothing is left in flight, so the next call for the cell runs afresh
+    assert service._verify_flights._calls == {}
+
+
+def test_admission_sheds_when_the_queue_is_full():
+    controller = AdmissionController(max_active=1, max_waiting=1, wait_timeout=5)
+    assert controller.try_acquire()
+    waiter = threading.Thread(target=lambda: controller.try_acquire() and controller.release())
+    waiter.start()
+    _wait_until(lambda: controller.waiting == 1)
+
+    assert not controller.try_acquire()  # shed at once, without waiting
+    assert controller.rejected == 1
+    controller.release()
+    waiter.join(5)
+    assert controller.waiting == 0 and controller.rejected == 1
+
+
+def test_admission_sheds_when_the_wait_times_out():
+    controller = AdmissionController(max_active=1, max_waiting=1, wait_timeout=0.05)
+    assert controller.try_acquire()
+    start = time.monotonic()
+    assert not controller.try_acquire()
+    assert time.monotonic() - start >= 0.05
+    assert controller.rejected == 1 and controller.waiting == 0
+    assert controller.retry_after == 1
+
+
+def test_verify_returns_429_with_retry_after_when_shed(monkeypatch):
+    saturated = AdmissionController(max_active=1, max_waiting=0, wait_timeout=3)
+    assert saturated.try_acquire()
+    monkeypatch.setattr(geoverify_app, 'verify_admission', saturated)
+
+    response = geoverify_app.app.test_client().post('/api/verify', json={'lat': 11.4102, 'lon': 76.6950})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '3'
+    assert saturated.rejected == 1
+
+
+@pytest.mark.parametrize('env, limits', [
+    ({}, (2, 1)),
+    ({'GEOVERIFY_THREADS': '8'}, (4, 3)),
+    ({'VERIFY_MAX_CONCURRENT': '10', 'VERIFY_MAX_QUEUE': '10'}, (3, 0)),
+    ({'VERIFY_MAX_CONCURRENT': '1', 'VERIFY_MAX_QUEUE': '10'}, (1, 2)),
+    ({'GEOVERIFY_THREADS': '1', 'VERIFY_MAX_QUEUE': '5'}, (1, 0)),
+])
+def test_admission_limits_are_capped_by_the_thread_budget(monkeypatch, env, limits):
+    for name in ('GEOVERIFY_THREADS', 'VERIFY_MAX_CONCURRENT', 'VERIFY_MAX_QUEUE'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    assert geoverify_app._verify_admission_limits() == limits
@@ -0,0 +1,144 @@
+import os
+
+import pytest
+
+from core import eventstore, serialization
+from core.blockchain import Blockchain
+from core.eventstore import EventStore
+from core.marketplace import CarbonMarketplace
+
+
+def _trading_marketplace(directory, snapshot_every=0):
+    marketplace = CarbonMarketplace(Blockchain(), EventStore(directory, snapshot_every=snapshot_every))
+    seller = marketplace.register_company('Seller Ltd', 'Forestry', 'Brazil', '0xseller')
+    buyer = marketplace.register_company('Buyer Ltd', 'Steel', 'India', '0xbuyer')
+    for number in range(12):
+        marketplace.create_listing(seller, 100.0, 20.0 + number, {}, f"Amazon Basin plot {number}",
+                                   'Reforestation project', -4.0 + number * 0.01, -62.0)
+    for _ in range(5):
+        marketplace.create_buy_order(buyer, 30.0, 25.0)
+    return marketplace
+
+
+def _projection(marketplace):
+    """Everything a restart must rebuild, minus the anchored flag"""
+    def rows(records):
+        return [{k: v for k, v in r.to_dict().items() if k != 'anchored'} for r in records]
+    return {
+        'sequence': marketplace.event_sequence,
+        'companies': rows(marketplace.companies.values()),
+        'listings': rows(marketplace.listings),
+        'orders': rows(marketplace.orders),
+        'transactions': rows(marketplace.transactions),
+        'search': marketplace.listing_search.search('amazon reforestation', 50),
+        'near': sorted(l.listing_id for l in marketplace.get_active_listings({'near': (-4.0, -62.0, 20)}))
+    }
+
+
+@pytest.mark.parametrize('can_fork', [True, False], ids=['forked-child', 'thread'])
+def test_background_snapshot_restores_the_same_state(tmp_path, monkeypatch, can_fork):
+    if can_fork and not eventstore._CAN_FORK:
+        pytest.skip("fork is not available here")
+    monkeypatch.setattr(eventstore, '_CAN_FORK', can_fork)
+    monkeypatch.setattr(eventstore, 'SNAPSHOT_CHUNK_ITEMS', 3)  # exercise chunked lists
+    marketplace = _trading_marketplace(tmp_path, snapshot_every=7)
+    marketplace.event_store.close()
+    assert marketplace.event_store._snapshot_paths()
+
+    restarted = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    assert _projection(restarted) == _projection(marketplace)
+
+
+def test_snapshot_state_is_a_copy(tmp_path):
+    marketplace = _trading_marketplace(tmp_path)
+    state = marketplace._snapshot_state()
+    before = _projection(marketplace)
+    # Changes made while the snapshot is being written must not leak into it
+    buyer = next(c for c in marketplace.companies.values() if c.name == 'Buyer Ltd')
+    marketplace.create_buy_order(buyer.company_id, 10.0, 30.0)
+    marketplace.create_listing(buyer.company_id, 5.0, 10.0, {}, 'Borneo plot', 'Peatland', 0.5, 114.0)
+    marketplace.event_store.write_snapshot(state['event_sequence'], state)
+
+    # The log tail after the snapshot offset is empty, so this is the snapshot alone
+    state, _ = EventStore(tmp_path).load()
+    restored = CarbonMarketplace.__new__(CarbonMarketplace)
+    CarbonMarketplace.__init__(restored, Blockchain())
+    restored.companies, restored.listings = {}, []
+    restored._load_snapshot_state(state)
+    assert _projection(restored) == before
+
+
+def test_restored_trades_are_marked_unanchored(tmp_path):
+    marketplace = _trading_marketplace(tmp_path)
+    assert marketplace.transactions and all(t.anchored for t in marketplace.transactions)
+    marketplace.event_store.close()
+
+    restarted = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    assert len(restarted.transactions) == len(marketplace.transactions)
+    assert not any(t.anchored for t in restarted.transactions)
+    buyer = next(c for c in restarted.companies.values() if c.name == 'Buyer Ltd')
+    restarted.create_buy_order(buyer.company_id, 10.0, 30.0)
+    assert restarted.transactions[-1].anchored
+
+
+def test_non_finite_amounts_never_reach_the_log(tmp_path):
+    marketplace = _trading_marketplace(tmp_path)
+    seller = next(c for c in marketplace.companies.values() if c.name == 'Seller Ltd')
+    sequence = marketplace.event_sequence
+    for bad in (float('nan'), float('inf')):
+        assert not marketplace.create_listing(seller.company_id, bad, 20.0, {}, 'Nan plot')['success']
+        assert not marketplace.create_buy_order(seller.company_id, 10.0, bad)['success']
+    with pytest.raises(ValueError):
+        marketplace.bulk_create_listings([{'seller_id': seller.company_id, 'credit_amount': 5.0,
+                                           'price_per_credit': float('-inf'), 'location': 'Inf plot'}])
+    assert marketplace.event_sequence == sequence
+
+    # The log itself refuses values JSON cannot carry, before writing anything
+    size = os.path.getsize(tmp_path / eventstore.LOG_FILE)
+    with pytest.raises(ValueError):
+        marketplace.event_store.append({'seq': sequence + 1, 'type': 'ORDER_PLACED',
+                                        'data': {'credit_amount': float('nan')}})
+    marketplace.event_store.close()
+    assert os.path.getsize(tmp_path / eventstore.LOG_FILE) == size
+    assert CarbonMarketplace(Blockchain(), EventStore(tmp_path)).event_sequence == sequence
+
+
+def _bulk_companies(count, offset=0):
+    return [{'name': f"Company {offset + n}", 'industry': 'Steel', 'country': 'India',
+             'wallet_address': f"0x{offset + n:040x}"} for n in range(count)]
+
+
+def test_torn_bulk_event_is_cut_off_before_the_next_append(tmp_path):
+    marketplace = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    marketplace.bulk_register_companies(_bulk_companies(2000))
+    marketplace.event_store.close()
+    log_path = tmp_path / eventstore.LOG_FILE
+    good = log_path.read_bytes()
+    # A crash half-way through a second bulk event, far more than 64 KB long
+    torn = serialization.dumps_strict({'seq': 99, 'type': 'COMPANIES_REGISTERED',
+                                       'data': {'companies': _bulk_companies(2000, 2000)}})
+    assert len(torn) > 200_000
+    log_path.write_bytes(good + torn[:len(torn) // 2])
+
+    restarted = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    assert len(restarted.companies) == 2000
+    restarted.register_company('After Crash Ltd', 'Cement', 'Kenya', '0xafter')
+    restarted.event_store.close()
+    assert log_path.read_bytes().startswith(good)
+    assert len(CarbonMarketplace(Blockchain(), EventStore(tmp_path)).companies) == 2001
+
+
+def test_undecodable_line_stops_the_load_and_is_truncated(tmp_path):
+    marketplace = _trading_marketplace(tmp_path)
+    marketplace.event_store.close()
+    log_path = tmp_path / eventstore.LOG_FILE
+    lines = log_path.read_bytes().splitlines(keepends=True)
+    log_path.write_bytes(b''.join(lines[:5]) + b'{"seq": 6, "type": "COMPA\n' + b''.join(lines[5:]))
+
+    restarted = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    assert restarted.event_sequence == 5
+    restarted.register_company('After Crash Ltd', 'Cement', 'Kenya', '0xafter')
+    restarted.event_store.close()
+    again = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    assert again.event_sequence == 6
+    assert any(c.name == 'After Crash Ltd' for c in again.companies.values())
@@ -0,0 +1,86 @@
+import csv
+import gzip
+
+import pytest
+
+import app as geoverify_app
+from core.blockchain import Blockchain
+from core.export import export_chain
+
+
+def _chain(timestamps):
+    """A chain whose blocks after genesis carry one verification each, at the given times"""
+    blockchain = Blockchain()
+    blockchain.chain[0].timestamp = '2024-12-31 00:00:00'
+    for number, timestamp in enumerate(timestamps):
+        block = blockchain.create_block(number + 2, blockchain.hash(blockchain.get_last_block()))
+        block.timestamp = timestamp
+        block.data.append({'latitude': float(number), 'longitude': 0.0, 'status': 'VERIFIED'})
+    return blockchain
+
+
+def _exported_blocks(manifest):
+    with gzip.open(manifest['files']['blocks']['path'], 'rt') as f:
+        return [int(row['block_index']) for row in csv.DictReader(f)]
+
+
+def test_tip_is_left_out_unless_sealed_count_is_given(tmp_path):
+    blockchain = _chain(['2025-01-01 00:00:00', '2025-01-02 00:00:00'])
+    manifest = export_chain(blockchain, tmp_path / 'a', file_format='csv', datasets=['blocks'])
+    assert _exported_blocks(manifest) == [1, 2]
+    manifest = export_chain(blockchain, tmp_path / 'b', file_format='csv', datasets=['blocks'],
+                            sealed_blocks=3)
+    assert _exported_blocks(manifest) == [1, 2, 3]
+
+
+@pytest.mark.parametrize('since, until', [
+    ('2025-01-02T00:00:00', '2025-01-03T00:00:00'),
+    ('2025-01-02T01:00:00+01:00', '2025-01-03T00:00:00Z'),
+    (1735776000, '1735862400'),
+])
+def test_since_until_accept_iso_and_epoch(tmp_path, since, until):
+    blockchain = _chain(['2025-01-01 00:00:00', '2025-01-02 00:00:00',
+                         '2025-01-03 00:00:00', '2025-01-04 00:00:00'])
+    manifest = export_chain(blockchain, tmp_path, file_format='csv', datasets=['blocks'],
+                            since=since, until=until, sealed_blocks=5)
+    assert _exported_blocks(manifest) == [3, 4]
+
+
+@pytest.mark.parametrize('options', [
+    {'since': 'yesterday'}, {'until': '2025-13-01'}, {'since': True},
+    {'since': '2025-01-03', 'until': '2025-01-02'},
+    {'start_block': [1]}, {'end_block': {'index': 2}}, {'start_block': 1.5}, {'end_block': 'two'},
+    {'start_block': True}
+])
+def test_invalid_bounds_raise_value_error(tmp_path, options):
+    with pytest.raises(ValueError):
+        export_chain(_chain(['2025-01-01 00:00:00']), tmp_path, file_format='csv', **options)
+
+
+def test_incremental_export_never_skips_blocks_by_time(tmp_path):
+    blockchain = _chain(['2025-01-01 00:00:00', '2025-01-02 00:00:00',
+                         '2025-01-03 00:00:00', '2025-01-04 00:00:00'])
+    options = dict(file_format='csv', datasets=['blocks'], incremental=True, sealed_blocks=5)
+
+    first = export_chain(blockchain, tmp_path, until='2025-01-02', **options)
+    assert _exported_blocks(first) == [1, 2, 3]
+    # A window starting later would pass over block 4
+    with pytest.raises(ValueError):
+        export_chain(blockchain, tmp_path, since='2025-01-04', **options)
+    rest = export_chain(blockchain, tmp_path, **options)
+    assert _exported_blocks(rest) == [4, 5]
+    assert export_chain(blockchain, tmp_path, **options)['up_to_date']
+
+
+def test_block_bounds_accept_numeric_strings(tmp_path):
+    chain = _chain(['2025-01-01 00:00:00'] * 4)
+    manifest = export_chain(chain, tmp_path, file_format='csv', sealed_blocks=len(chain.chain),
+                            start_block='2', end_block=3.0)
+    assert (manifest['start_block'], manifest['end_block']) == (2, 3)
+
+
+@pytest.mark.parametrize('body', [{'start_block': [1]}, {'end_block': {}}, {'datasets': 5}])
+def test_export_endpoint_rejects_malformed_bounds_with_400(tmp_path, monkeypatch, body):
+    monkeypatch.setattr(geoverify_app, 'EXPORT_DIR', str(tmp_path))
+    response = geoverify_app.app.test_client().post('/api/export', json=dict(body, format='csv'))
+    assert response.status_code == 400
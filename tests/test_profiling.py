@@ -0,0 +1,76 @@
+import pytest
+
+import app as geoverify_app
+from core.profiling import ProfileStore
+from core.verifier import GeoSentinel
+
+
+class _FakeProfiler:
+    """Stands in for a sampler: finish() only needs stop(), stacks and samples"""
+    def __init__(self, stacks):
+        self.stacks = stacks
+        self.samples = sum(stacks.values())
+
+    def stop(self):
+        pass
+
+
+def _finish(store, stacks, path='/api/test'):
+    handle = {'mode': 'sample', 'profiler': _FakeProfiler(stacks), 'started_at': 0.0, 'start': 0.0}
+    return store.finish(handle, 'GET', path, 200)
+
+
+def test_ring_buffer_keeps_the_newest_profiles():
+    store = ProfileStore(enabled=True, capacity=3)
+    for number in range(5):
+        _finish(store, {'app:view': 1}, path=f"/api/{number}")
+
+    assert [p['profile_id'] for p in store.list_profiles()] == [5, 4, 3]
+    assert store.get_profile(2) is None
+    assert store.get_profile(4)['path'] == '/api/3'
+    assert 'stacks' not in store.list_profiles()[0]
+
+
+def test_component_totals_count_each_stack_once_per_component():
+    store = ProfileStore(enabled=True)
+    record = _finish(store, {
+        'app:view;marketplace:CarbonMarketplace.search;search:SearchIndex.search': 4,
+        'app:view;verifier:GeoSentinel.verify_location;verifier:GeoSentinel._assess': 3,
+        'app:view;marketplace:CarbonMarketplace.execute_transaction;blockchain:Blockchain.hash': 2,
+        'app:view': 1
+    })
+    assert record['components'] == {'CarbonMarketplace': 6, 'GeoSentinel': 3, 'Blockchain': 2}
+    assert record['samples'] == 10
+
+
+def test_collapsed_output_is_heaviest_stack_first():
+    profile = {'stacks': {'app:view;marketplace:search': 2, 'app:view;verifier:assess': 5}}
+    assert ProfileStore.collapsed(profile) == 'app:view;verifier:assess 5\napp:view;marketplace:search 2\n'
+
+
+def test_cprofile_mode_attributes_time_to_components():
+    store = ProfileStore(enabled=True)
+    handle = store.start('cprofile')
+    sentinel = GeoSentinel()
+    for number in range(200):
+        sentinel.verify_location(10.0 + number * 0.01, 20.0)
+    record = store.finish(handle, 'POST', '/api/verify', 200)
+
+    assert record['mode'] == 'cprofile'
+    assert record['components'].get('GeoSentinel', 0) > 0
+    assert 'verify_location' in record['report']
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in ProfileStore.collapsed(record).splitlines())
+
+
+@pytest.mark.parametrize('token, header, status', [
+    ('', None, 404),          # enabled but no token configured: closed
+    ('s3cret', None, 403),
+    ('s3cret', 'wrong', 403),
+    ('s3cret', 's3cret', 200),
+])
+def test_admin_endpoints_need_a_configured_token(monkeypatch, token, header, status):
+    monkeypatch.setattr(geoverify_app, 'profiles', ProfileStore(enabled=True))
+    monkeypatch.setattr(geoverify_app, 'PROFILING_ADMIN_TOKEN', token)
+    headers = {'X-Admin-Token': header} if header else {}
+    response = geoverify_app.app.test_client().get('/api/admin/profiles', headers=headers)
+    assert response.status_code == status
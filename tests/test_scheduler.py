@@ -0,0 +1,85 @@
+import time
+
+from core.blockchain import Blockchain
+from core.eventstore import EventStore
+from core.marketplace import CarbonMarketplace
+from core.scheduler import TimerHeap
+
+AFTER_EXPIRY = 31 * 24 * 60 * 60  # listings expire 30 days after creation
+
+
+def test_pop_due_returns_due_keys_earliest_first():
+    timers = TimerHeap()
+    for deadline, key in [(30, 'c'), (10, 'a'), (50, 'e'), (20, 'b'), (10, 'a2'), (40, 'd')]:
+        timers.schedule(deadline, key)
+    assert timers.next_deadline() == 10
+
+    assert timers.pop_due(5) == []
+    assert timers.pop_due(30) == ['a', 'a2', 'b', 'c']  # ties keep scheduling order
+    assert len(timers) == 2 and timers.next_deadline() == 40
+    assert timers.pop_due(100) == ['d', 'e']
+    assert timers.next_deadline() is None
+
+
+def _marketplace(event_store=None):
+    marketplace = CarbonMarketplace(Blockchain(), event_store)
+    seller = marketplace.register_company('Seller Ltd', 'Forestry', 'Brazil', '0xseller')
+    buyer = marketplace.register_company('Buyer Ltd', 'Steel', 'India', '0xbuyer')
+    for number in range(3):
+        marketplace.create_listing(seller, 100.0, 20.0, {}, f"Amazon Basin plot {number}",
+                                   'Reforestation project', -4.0 + number * 0.01, -62.0)
+    return marketplace, seller, buyer
+
+
+def test_expiry_moves_listings_out_of_the_live_book():
+    marketplace, seller, _ = _marketplace()
+    expired = marketplace.expire_listings(time.time() + AFTER_EXPIRY)
+
+    assert len(expired) == 3
+    assert all(listing.status == 'EXPIRED' for listing in marketplace.listings)
+    assert marketplace.active_listings == {}
+    assert marketplace.geo_index.within_radius(-4.0, -62.0, 50) == []
+    assert marketplace.listing_search.search('amazon reforestation', 10) == (0, [])
+    # The location is free to be listed again
+    assert marketplace.create_listing(seller, 50.0, 21.0, {}, 'Amazon Basin plot 0')['success']
+
+
+def test_one_block_per_expiry_batch():
+    marketplace, _, _ = _marketplace()
+    height = len(marketplace.blockchain.chain)
+    marketplace.expire_listings(time.time() + AFTER_EXPIRY)
+
+    assert len(marketplace.blockchain.chain) == height + 1
+    entries = marketplace.blockchain.chain[-1].data
+    assert [entry['type'] for entry in entries] == ['LISTING_EXPIRED'] * 3
+    assert sorted(entry['listing_id'] for entry in entries) == sorted(l.listing_id for l in marketplace.listings)
+    # Nothing left to expire: no block
+    marketplace.expire_listings(time.time() + 2 * AFTER_EXPIRY)
+    assert len(marketplace.blockchain.chain) == height + 1
+
+
+def test_stale_timers_of_sold_out_listings_are_skipped():
+    marketplace, seller, buyer = _marketplace()
+    sold = marketplace.listings[0]
+    marketplace.execute_transaction(buyer, seller, sold.listing_id, sold.available_amount, sold.price_per_credit)
+    assert sold.status == 'SOLD_OUT'
+
+    expired = marketplace.expire_listings(time.time() + AFTER_EXPIRY)
+    assert sold not in expired and len(expired) == 2
+    assert sold.status == 'SOLD_OUT'
+    assert sold.listing_id not in [entry['listing_id'] for entry in marketplace.blockchain.chain[-1].data]
+
+
+def test_expiry_is_replayed_after_a_restart(tmp_path):
+    marketplace, seller, _ = _marketplace(EventStore(tmp_path, snapshot_every=0))
+    marketplace.expire_listings(time.time() + AFTER_EXPIRY)
+    marketplace.create_listing(seller, 50.0, 21.0, {}, 'Amazon Basin plot 0')
+    marketplace.event_store.close()
+
+    restarted = CarbonMarketplace(Blockchain(), EventStore(tmp_path))
+    statuses = [listing.status for listing in restarted.listings]
+    assert statuses == ['EXPIRED', 'EXPIRED', 'EXPIRED', 'ACTIVE']
+    assert list(restarted.active_listings) == [restarted.listings[-1].listing_id]
+    assert restarted.geo_index.within_radius(-4.0, -62.0, 50) == []
+    # Replay leaves no live timers behind for the expired listings
+    assert restarted.expire_listings(time.time() + AFTER_EXPIRY) == [restarted.listings[-1]]
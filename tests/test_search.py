@@ -0,0 +1,51 @@
+import heapq
+import random
+
+import pytest
+
+from core.search import SearchIndex, tokenize
+
+WORDS = ['amazon', 'basin', 'congo', 'borneo', 'reforestation', 'project', 'mangrove',
+         'restoration', 'protected', 'rainforest', 'area', 'peatland', 'green', 'works']
+
+
+def _brute_force(index, query, limit):
+    """Conjunctive BM25 over every document, the reference for SearchIndex.search"""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if any(t not in index._postings for t in terms):
+        return 0, []
+    matches = [(sum(index._postings[t][d] * index._idf(t) for t in terms), d)
+               for d in index._doc_terms if all(d in index._postings[t] for t in terms)]
+    return len(matches), heapq.nlargest(limit, matches)
+
+
+def _random_doc(rng):
+    return {'description': ' '.join(rng.choices(WORDS, k=rng.randint(2, 8))),
+            'location': ' '.join(rng.choices(WORDS[:4], k=rng.randint(1, 2)))}
+
+
+@pytest.mark.parametrize('limit', [1, 5, 40])
+def test_search_matches_brute_force_under_writes(limit):
+    rng = random.Random(limit)
+    index = SearchIndex({'description': 1.0, 'location': 2.0})
+    for number in range(600):
+        index.add(f"doc-{number}", _random_doc(rng))
+
+    queries = ['amazon', 'amazon basin', 'reforestation project', 'protected rainforest congo',
+               'green works area', 'peatland borneo mangrove']
+    for round_number in range(30):
+        for query in queries:
+            count, found = index.search(query, limit)
+            expected_count, expected = _brute_force(index, query, limit)
+            assert count == expected_count
+            # Ties may come back in any order; the scores must agree exactly
+            assert [round(score, 9) for score, _ in found] == \
+                [round(score, 9) for score, _ in expected]
+            for score, doc_id in found:
+                assert round(score, 9) == round(sum(
+                    index._postings[t][doc_id] * index._idf(t)
+                    for t in dict.fromkeys(tokenize(query))), 9)
+        # Writes between queries: new documents, re-indexed ones and removals
+        for _ in range(20):
+            index.add(f"doc-{rng.randrange(800)}", _random_doc(rng))
+            index.remove(f"doc-{rng.randrange(800)}")
@@ -0,0 +1,66 @@
+import hashlib
+import json
+
+import pytest
+
+from core.blockchain import Block, Blockchain
+from core.serialization import canonical_bytes, dumps, loads
+
+# Blocks as the pre-record code stored them: plain dicts hashed with
+# json.dumps(block, sort_keys=True). Version 1 must reproduce those bytes.
+LEGACY_BLOCKS = [
+    {
+        'index': 1, 'timestamp': '2024-01-01 00:00:00', 'proof': 1,
+        'previous_hash': '0', 'data': []
+    },
+    {
+        'index': 2, 'timestamp': '2024-01-01 00:00:05', 'proof': 2,
+        'previous_hash': 'a' * 64,
+        'data': [{
+            'latitude': 11.4102, 'longitude': 76.695, 'green_cover_percentage': 94.5,
+            'ai_confidence': 99.0, 'status': 'VERIFIED', 'carbon_credits': 23.39,
+            'reasons': ['High Density Forest Detected'], 'timestamp': 1704067205.123456
+        }]
+    },
+    {
+        'index': 3, 'timestamp': '2024-01-01 00:00:09', 'proof': 3,
+        'previous_hash': 'b' * 64,
+        'data': [{
+            'type': 'CARBON_CREDIT_TRADE', 'transaction_id': 'TXN-3000',
+            'buyer': 'Grüne Stahl GmbH', 'seller': 'Floresta Amazônia Ltda',
+            'note': '碳信用 — émissions ✓ \U0001f333 "quoted" \\ back\nslash',
+            'amount': 1e-300, 'price': 1.7976931348623157e308, 'total_value': 5e-324,
+            'tiny': -0.0, 'third': 1 / 3, 'big_int': 2 ** 70, 'negative': -123456789.987654321,
+            'flags': [True, False, None], 'nested': {'z': 1, 'a': {'y': [], 'b': {}}}
+        }]
+    },
+]
+
+# sha256 of LEGACY_BLOCKS[2] under canonical version 1. If this changes,
+# existing chains no longer validate: add a new version instead.
+PINNED_HASH_V1 = '520958ee9e2b7bbe84ab2b30e6b2d88e6c9a63b1fa18ec4bcfbef47fa37a36f0'
+
+
+@pytest.mark.parametrize('legacy', LEGACY_BLOCKS, ids=lambda b: f"block-{b['index']}")
+def test_version_1_matches_legacy_json_dumps(legacy):
+    expected = json.dumps(legacy, sort_keys=True).encode()
+    assert canonical_bytes(legacy, 1) == expected
+    assert canonical_bytes(Block.from_dict(legacy), 1) == expected
+
+
+def test_version_1_block_hash_is_pinned():
+    block = Block.from_dict(LEGACY_BLOCKS[2])
+    assert Blockchain(hash_version=1).hash(block) == PINNED_HASH_V1
+    assert hashlib.sha256(json.dumps(LEGACY_BLOCKS[2], sort_keys=True).encode()).hexdigest() == PINNED_HASH_V1
+
+
+def test_unknown_version_is_rejected():
+    with pytest.raises(ValueError):
+        canonical_bytes(LEGACY_BLOCKS[0], 99)
+
+
+def test_response_encoder_does_not_affect_hashes():
+    block = Block.from_dict(LEGACY_BLOCKS[2])
+    assert loads(dumps(block)) == loads(json.dumps(LEGACY_BLOCKS[2]))
+    # The response encoder is compact and UTF-8; the canonical one is not
+    assert dumps(block) != canonical_bytes(block)
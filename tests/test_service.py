@@ -0,0 +1,41 @@
+from core.service import GeoVerifyService
+
+# Demo coordinates the sentinel always reports as VERIFIED
+DEMO_LAT, DEMO_LON = 11.4102, 76.6950
+
+
+def _service_with_company():
+    service = GeoVerifyService()
+    company = service.register_company('Listing Test Ltd', 'Steel', 'India', '0xwallet')
+    return service, company
+
+
+def test_listing_coordinates_must_match_a_verified_result():
+    service, company = _service_with_company()
+    result = service.create_listing(company, 10.0, 20.0, {'verified': True}, 'Somewhere',
+                                    latitude=-3.5, longitude=-60.25)
+    assert not result['success']
+    assert service.get_active_listings({'near': (-3.5, -60.25, 50)}) == []
+
+
+def test_listing_takes_position_and_data_from_the_sentinel():
+    service, company = _service_with_company()
+    verified = service.verify_and_record(DEMO_LAT, DEMO_LON)['verification']
+    # Within ~500m of the scan: the listing snaps to the VERIFIED result
+    result = service.create_listing(company, 10.0, 20.0,
+                                    {'verified': True, 'green_cover_percentage': 100.0},
+                                    'Western Ghats', latitude=DEMO_LAT + 0.002,
+                                    longitude=DEMO_LON - 0.001)
+    assert result['success']
+    listing = result['listing']
+    assert (listing.latitude, listing.longitude) == (DEMO_LAT, DEMO_LON)
+    assert listing.verification_data == verified.to_dict()
+    assert [l.listing_id for l in service.get_active_listings({'near': (DEMO_LAT, DEMO_LON, 1)})] \
+        == [listing.listing_id]
+
+
+def test_listing_without_coordinates_is_not_geo_indexed():
+    service, company = _service_with_company()
+    result = service.create_listing(company, 10.0, 20.0, {'verified': True}, 'Unknown')
+    assert result['success']
+    assert result['listing'].latitude is None
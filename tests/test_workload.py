@@ -0,0 +1,90 @@
+import pytest
+
+from core import workload
+from core.blockchain import Blockchain
+from core.marketplace import CarbonMarketplace
+from core.verifier import GeoSentinel
+from core.workload import CELL_DEGREES, WorkloadGenerator, load_workload
+
+DOUBLE_COUNTING = "CRITICAL: Potential Double Counting Detected"
+
+
+def _too_close(a, b):
+    return abs(a[0] - b[0]) < CELL_DEGREES and abs(a[1] - b[1]) < CELL_DEGREES
+
+
+def test_generated_coordinates_keep_the_double_counting_distance(monkeypatch):
+    # One tiny hotspot, so most candidates land next to an earlier point
+    monkeypatch.setattr(workload, 'HOTSPOTS', [('Plot', 10.0, 20.0, 0.01, 1)])
+    taken = [(10.0, 20.0), (10.006, 20.004), (9.994, 19.997)]
+    generator = WorkloadGenerator(seed=7, taken_points=taken)
+    points = [(lat, lon) for _, lat, lon in generator.coordinates(200)]
+
+    everything = taken + points
+    for i, point in enumerate(everything):
+        for other in everything[i + 1:]:
+            assert not _too_close(point, other), (point, other)
+
+
+def test_verify_batch_flags_double_counting():
+    sentinel = GeoSentinel()
+    first = sentinel.verify_location(11.4102, 76.6950)
+    assert first.status == "VERIFIED"
+    # Across a cell boundary from the first point, and repeated within the batch
+    results = sentinel.verify_batch([(11.4142, 76.6990), (11.4102, 76.6950)])
+    assert [DOUBLE_COUNTING in r.reasons for r in results] == [True, True]
+    assert sentinel.verification_history == [first]
+
+
+def test_repeated_loads_never_double_count():
+    blockchain = Blockchain()
+    sentinel = GeoSentinel()
+    marketplace = CarbonMarketplace(blockchain)
+    for seed in (1, 1, 2):
+        load_workload(blockchain, sentinel, marketplace, companies=20, verifications=500,
+                      listings=50, orders=20, seed=seed)
+
+    entries = [entry for block in blockchain.chain for entry in block.data if 'reasons' in entry]
+    assert len(entries) == 1500
+    assert not any(DOUBLE_COUNTING in entry['reasons'] for entry in entries)
+
+
+def test_repeated_loads_never_list_a_location_twice():
+    blockchain = Blockchain()
+    marketplace = CarbonMarketplace(blockchain)
+    sentinel = GeoSentinel()
+    for _ in range(2):
+        load_workload(blockchain, sentinel, marketplace, companies=10, verifications=0,
+                      listings=100, orders=0, seed=3)
+
+    locations = [l.location.strip() for l in marketplace.active_listings.values()]
+    assert len(locations) == 200
+    assert len(set(locations)) == 200
+    assert len(marketplace.active_locations) == 200
+
+
+def test_bulk_listings_check_for_duplicate_locations():
+    marketplace = CarbonMarketplace(Blockchain())
+    seller = marketplace.register_company('Seller Ltd', 'Forestry', 'Brazil', '0xseller')
+    marketplace.create_listing(seller, 10.0, 20.0, {}, 'Amazon Basin plot 1')
+    listing = {'seller_id': seller, 'credit_amount': 5.0, 'price_per_credit': 20.0}
+    for locations in (['Amazon Basin plot 1 '], ['Borneo plot', 'Borneo plot']):
+        with pytest.raises(ValueError):
+            marketplace.bulk_create_listings([dict(listing, location=l) for l in locations])
+    assert len(marketplace.active_listings) == 1
+
+
+def test_every_geo_indexed_listing_sits_on_a_verified_result():
+    blockchain = Blockchain()
+    sentinel = GeoSentinel()
+    marketplace = CarbonMarketplace(blockchain)
+    load_workload(blockchain, sentinel, marketplace, companies=10, verifications=20,
+                  listings=100, orders=0, seed=5)
+
+    assert len(marketplace.active_listings) == 100
+    on_chain = {(e['latitude'], e['longitude']) for block in blockchain.chain for e in block.data
+                if e.get('status') == "VERIFIED"}
+    for listing in marketplace.active_listings.values():
+        assert (listing.latitude, listing.longitude) in on_chain
+        verified = sentinel.find_verified(listing.latitude, listing.longitude)
+        assert verified is not None and listing.verification_data == verified.to_dict()